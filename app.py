@@ -1,12 +1,23 @@
 from flask import Flask, request, jsonify, make_response
-from slack_bolt import App
+from slack_bolt import App, BoltResponse
 from slack_bolt.adapter.flask import SlackRequestHandler
-from github import Github
+from slack_sdk.errors import SlackApiError
 import os
 from dotenv import load_dotenv
 import logging
+from services.github_client import is_transient_error as is_transient_github_error
 from services.github_service import GitHubService
+from services.intent_router import IntentRouter
+from services.job_queue import JobQueue, JobQueueFull
 from services.code_analyzer import CodeAnalyzer
+from services.event_dedup import EventDeduplicator
+from services.event_filter import MessageEventFilter
+from services.llm_client import LLMUnavailableError
+from services.metrics import metrics
+from services.tree_lister import TreeEntry
+from services.response_cache import normalize_question
+from services.single_flight import SingleFlight
+from services.slack_streamer import SlackMessageStreamer
 
 # 로깅 설정
 logging.basicConfig(level=logging.DEBUG)
@@ -26,48 +37,194 @@ slack_app = App(
 
 handler = SlackRequestHandler(slack_app)
 github_service = GitHubService()
-code_analyzer = CodeAnalyzer()
+code_analyzer = CodeAnalyzer(github_service)
+stream_responses = os.environ.get("SLACK_STREAMING", "true").lower() in ("1", "true", "yes")
+# 같은 레포지토리·커밋·질문의 분석이 동시에 들어오면 한 번만 실행
+analysis_flights = SingleFlight("analysis")
+intent_router = IntentRouter()
+message_filter = MessageEventFilter(intent_router)
+event_deduplicator = EventDeduplicator()
+
+@slack_app.middleware
+def drop_irrelevant_messages(body, context, next):
+    """봇·수정·다른 채널·질문이 아닌 메시지는 리스너를 실행하지 않고 응답만 보냄"""
+    reason, intent = message_filter.check(body)
+    if reason:
+        metrics.incr(f"slack_events.filtered.{reason}")
+        return BoltResponse(status=200, body="")
+    if intent is not None:
+        # 리스너가 메시지를 다시 분류하지 않도록 판별 결과 전달
+        context["intent"] = intent
+    next()
+
+@slack_app.middleware
+def drop_duplicate_events(body, request, next):
+    """이미 받은 이벤트의 재전송은 리스너를 실행하지 않고 응답만 보냄"""
+    if request.headers.get("x-slack-retry-num"):
+        metrics.incr("slack_events.retries")
+    if event_deduplicator.seen(EventDeduplicator.event_keys(body)):
+        metrics.incr("slack_events.dropped.duplicate")
+        return BoltResponse(status=200, body="")
+    next()
 
 @slack_app.event("message")
-def handle_message(body, say):
+def handle_message(body, say, context):
     """메시지 이벤트 처리"""
     try:
         message = body["event"]["text"]
-        thread_ts = body["event"].get("thread_ts", None)
-        
+        match = context.get("intent") or intent_router.route(message)
+        if match is None:
+            return
+
         # GitHub 토큰이 없는 경우 연동 요청
         if not github_service.has_token():
             say("먼저 GitHub 계정을 연동해주세요. `/connect-github` 명령어를 사용해주세요.")
             return
 
-        # 레포지토리 문의
-        if "레포지토리" in message or "repo" in message.lower():
-            repos = github_service.get_repositories()
-            repo_list = "\n".join([f"- {repo.name}" for repo in repos])
-            say(f"다음 레포지토리들이 있습니다:\n{repo_list}\n\n어떤 레포지토리를 확인하시겠습니까?")
-            return
+        intent_router.dispatch(match, event=body["event"], say=say)
+
+    except Exception as e:
+        logger.error(f"Error handling message: {str(e)}")
+        say("죄송합니다. 오류가 발생했습니다.")
+
+@intent_router.intent("list_repos", ["레포지토리", "레포", "저장소", "repo"])
+def handle_repo_question(match, event, say):
+    """레포지토리 문의"""
+    repos = github_service.get_repositories()
+    repo_list = "\n".join([f"- {repo['name']}" for repo in repos])
+    say(f"다음 레포지토리들이 있습니다:\n{repo_list}\n\n어떤 레포지토리를 확인하시겠습니까?")
+
+@intent_router.intent("feature_check", ["구현", "기능", "implement", "feature"])
+def handle_feature_question(match, event, say):
+    """기능 구현 여부 문의"""
+    # 컨텍스트에서 레포지토리 정보 가져오기
+    repo_name = github_service.get_current_repo()
+    if not repo_name:
+        say("먼저 확인하실 레포지토리를 알려주세요.")
+        return
+
+    # 분석은 워커에서 실행하고 핸들러는 바로 반환 (결과는 질문 스레드에 게시)
+    try:
+        job_queue.enqueue("analysis", {
+            "channel": event["channel"],
+            "thread_ts": event.get("thread_ts") or event["ts"],
+            "repo_name": repo_name,
+            "message": event["text"],
+            "keywords": match.keywords
+        })
+    except JobQueueFull:
+        say("요청이 많아 지금은 분석을 시작할 수 없습니다. 잠시 후 다시 시도해주세요.")
 
-        # 기능 구현 여부 문의
-        if "구현" in message or "기능" in message:
-            # 컨텍스트에서 레포지토리 정보 가져오기
-            repo_name = github_service.get_current_repo()
-            if not repo_name:
-                say("먼저 확인하실 레포지토리를 알려주세요.")
-                return
+def run_analysis_job(job):
+    """워커에서 실행되는 분석 작업 (실패하면 JobQueue가 완료한 단계 다음부터 재시도)"""
+    payload = job.payload
+    client = slack_app.client
+    channel, thread_ts = payload["channel"], payload["thread_ts"]
 
-            # 코드 분석
-            files = github_service.get_potential_files(repo_name, message)
-            if not files:
-                say("해당 기능이 구현되어 있을 만한 파일을 찾지 못했습니다.")
-                return
+    def reply(text):
+        client.chat_postMessage(channel=channel, thread_ts=thread_ts, text=text)
 
-            # 파일 내용 분석
-            analysis_result = code_analyzer.analyze_files(files, message)
-            say(f"분석 결과:\n{analysis_result}")
+    answer_question(job, client, reply, channel, thread_ts, payload["repo_name"], payload["message"],
+                    payload.get("keywords"))
 
+def analysis_job_failed(job, error):
+    """포기한 분석 작업 안내 (스트리밍 중이던 메시지가 있으면 그 메시지를 갱신)"""
+    channel, text = job.payload["channel"], "죄송합니다. 오류가 발생했습니다."
+    placeholder_ts = job.stages.get("placeholder")
+    if placeholder_ts:
+        slack_app.client.chat_update(channel=channel, ts=placeholder_ts, text=text)
+    else:
+        slack_app.client.chat_postMessage(channel=channel, thread_ts=job.payload["thread_ts"], text=text)
+
+def is_transient_error(error) -> bool:
+    """다시 시도할 오류인지 판단 (LLM·GitHub·Slack의 일시적 장애와 한도 초과만 재시도)"""
+    if isinstance(error, LLMUnavailableError):
+        return True
+    if isinstance(error, SlackApiError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return is_transient_github_error(error)
+
+job_queue = JobQueue()
+job_queue.register("analysis", run_analysis_job, on_failure=analysis_job_failed, retryable=is_transient_error)
+# reloader 감시 프로세스에서는 워커를 띄우지 않음 (남은 작업은 다시 뜨는 자식 프로세스가 이어서 처리)
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    job_queue.start()
+
+def answer_question(job, client, say, channel, thread_ts, repo_name, message, keywords=None):
+    """질문 분석 후 답변 (동시에 들어온 같은 질문은 첫 실행의 결과를 받아 게시)"""
+    def list_tree():
+        commit_sha = github_service.get_head_sha(repo_name)
+        github_service.list_files(repo_name, commit_sha)
+        return commit_sha
+
+    commit_sha = job.stage("tree_listing", list_tree)
+    key = (repo_name, commit_sha, normalize_question(message))
+    result, shared = analysis_flights.do_shared(
+        key, lambda: run_analysis(job, client, say, channel, thread_ts, repo_name, commit_sha, message, keywords)
+    )
+    if shared:
+        say(result)
+
+def run_analysis(job, client, say, channel, thread_ts, repo_name, commit_sha, message, keywords=None) -> str:
+    """관련 파일을 찾아 분석 결과를 게시하고, 게시한 최종 텍스트를 반환"""
+    selected = job.stage("file_selection", lambda: [
+        list(entry) for entry in github_service.get_potential_files(repo_name, message, commit_sha, keywords)
+    ])
+    files = [TreeEntry(*entry) for entry in selected]
+    if not files:
+        text = "해당 기능이 구현되어 있을 만한 파일을 찾지 못했습니다."
+        say(text)
+        return text
+
+    # 내용은 blob 캐시에 저장되므로 이후 단계와 재시도에서는 다시 받지 않음
+    job.stage("content_fetch", lambda: sum(
+        content is not None for content in github_service.get_file_contents(repo_name, files)
+    ))
+
+    # 파일 내용 분석 (재시작 전에 이미 답변을 만들었다면 그 결과를 게시)
+    resumed = "llm_call" in job.stages
+    if stream_responses:
+        text = job.stage("llm_call", lambda: stream_analysis(
+            job, client, channel, thread_ts, repo_name, files, message, keywords
+        ))
+    else:
+        text = job.stage("llm_call", lambda: "분석 결과:\n" + code_analyzer.analyze_files(
+            repo_name, files, message, keywords
+        ))
+        resumed = True
+    if resumed:
+        placeholder_ts = job.stages.get("placeholder")
+        if placeholder_ts:
+            # 스트리밍한 메시지에 이미 답변이 있으므로 새로 올리지 않고 그 메시지를 최종 텍스트로 맞춤
+            client.chat_update(channel=channel, ts=placeholder_ts, text=text)
+        else:
+            say(text)
+    return text
+
+def stream_analysis(job, client, channel, thread_ts, repo_name, files, message, keywords=None) -> str:
+    """분석 결과를 생성되는 대로 하나의 메시지에 갱신하며 게시
+
+    재시도 때는 처음 게시한 메시지를 다시 사용하고, 오류는 비스트리밍과 같이 JobQueue로 전달해
+    재시도 여부와 최종 안내(analysis_job_failed)를 맡깁니다.
+    """
+    streamer = SlackMessageStreamer(client, channel, thread_ts, prefix="분석 결과:\n",
+                                    ts=job.stages.get("placeholder"))
+    streamer.start()
+    job.stage("placeholder", lambda: streamer.ts)
+    try:
+        for delta in code_analyzer.analyze_files_stream(repo_name, files, message, keywords):
+            streamer.append(delta)
+        streamer.finish()
+        return f"{streamer.prefix}{streamer.text}"
     except Exception as e:
-        logger.error(f"Error handling message: {str(e)}")
-        say("죄송합니다. 오류가 발생했습니다.")
+        logger.error(f"Error streaming analysis: {str(e)}")
+        if is_transient_error(e):
+            try:
+                streamer.fail("분석 서비스가 일시적으로 불안정합니다. 잠시 후 자동으로 다시 시도합니다.")
+            except Exception as update_error:
+                # 안내 갱신 실패가 원래 오류(재시도 판단 기준)를 가리지 않도록 기록만 함
+                logger.warning(f"Failed to post retry notice: {str(update_error)}")
+        raise
 
 @slack_app.command("/connect-github")
 def handle_github_connect(ack, body, respond):
@@ -116,6 +273,11 @@ def slack_events():
         logger.error(f"Error handling slack event: {str(e)}")
         return make_response(str(e), 500)
 
+@flask_app.route("/metrics", methods=["GET"])
+def metrics_snapshot():
+    """내부 지표 조회"""
+    return jsonify(metrics.snapshot())
+
 if __name__ == "__main__":
     logger.info("Starting Flask application")
     flask_app.run(debug=True, port=5000)
\ No newline at end of file
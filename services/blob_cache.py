@@ -0,0 +1,87 @@
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+class BlobCache:
+    """Git blob SHA를 키로 하는 파일 내용 캐시 (메모리 LRU + 압축 디스크)"""
+
+    def __init__(self, cache_dir: str = "data/cache/blobs", memory_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes if memory_bytes is not None else int(
+            os.environ.get("BLOB_CACHE_MEMORY_BYTES", DEFAULT_MEMORY_BYTES)
+        )
+        self.lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, sha: str) -> Optional[bytes]:
+        """blob 내용 조회 (메모리 → 디스크 순, 없으면 None)"""
+        with self.lock:
+            content = self._memory.get(sha)
+            if content is not None:
+                self._memory.move_to_end(sha)
+                return content
+
+        try:
+            with open(self._path_for(sha), 'rb') as f:
+                content = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+        with self.lock:
+            self._remember(sha, content)
+        return content
+
+    def put(self, sha: str, content: bytes):
+        """blob 내용을 디스크와 메모리에 저장"""
+        path = self._path_for(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(content))
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            self._remember(sha, content)
+
+    def contains(self, sha: str) -> bool:
+        """blob을 보유하고 있는지 확인"""
+        with self.lock:
+            if sha in self._memory:
+                return True
+        return os.path.exists(self._path_for(sha))
+
+    def get_or_fetch(self, sha: str, fetch: Callable[[], bytes]) -> bytes:
+        """캐시에 없는 경우에만 fetch를 호출해 내용을 가져오고 저장"""
+        content = self.get(sha)
+        if content is None:
+            content = fetch()
+            self.put(sha, content)
+        return content
+
+    def _remember(self, sha: str, content: bytes):
+        """메모리 계층에 추가하고 한도를 넘으면 가장 오래된 항목부터 제거"""
+        if sha in self._memory:
+            self._memory.move_to_end(sha)
+            return
+        if len(content) > self.memory_bytes:
+            return
+
+        self._memory[sha] = content
+        self._memory_size += len(content)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _path_for(self, sha: str) -> str:
+        return os.path.join(self.cache_dir, sha[:2], sha[2:])
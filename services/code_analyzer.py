@@ -1,36 +1,234 @@
-from typing import List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
+import os
+import time
+from services.context_packer import ContextPacker, PackResult
 from services.gpt_service import GPTService
+from services.metrics import metrics
+from services.summary_store import SummaryStore
+from services.symbol_index import SymbolStore, select_snippets
+from services.tree_lister import TreeEntry
 
 logger = logging.getLogger(__name__)
 
 class CodeAnalyzer:
-    def __init__(self):
+    def __init__(self, github_service):
+        self.github_service = github_service
         self.gpt_service = GPTService()
+        self.symbol_store = SymbolStore()
+        self.context_packer = ContextPacker()
+        # auto: 한 번의 프롬프트로는 잃는 문맥이 클 때만 map-reduce / single / map_reduce
+        self.analysis_mode = os.environ.get("ANALYSIS_MODE", "auto")
+        self.map_max_groups = int(os.environ.get("MAP_REDUCE_MAX_GROUPS", 8))
+        # auto 모드에서 한 번의 프롬프트로 잃는 관련도 가치나 토큰 비율이 이 값 이상일 때만 map-reduce
+        self.map_min_dropped_value = float(os.environ.get("MAP_REDUCE_MIN_DROPPED_VALUE", 0.2))
+        self.map_min_dropped_token_ratio = float(os.environ.get("MAP_REDUCE_MIN_DROPPED_TOKEN_RATIO", 0.5))
+        self.map_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("MAP_REDUCE_CONCURRENCY", 4)), thread_name_prefix="map-analysis"
+        )
+        self.summary_store = SummaryStore(self.gpt_service)
+        # 저렴한 모델로 파일을 먼저 추린 뒤 최종 분석 모델 호출
+        self.cascade = os.environ.get("MODEL_CASCADE", "true").lower() == "true"
+        self.triage_answer_min_confidence = float(os.environ.get("TRIAGE_ANSWER_MIN_CONFIDENCE", 0.9))
+        # 상위 N개 파일만 원본을 보내고 나머지는 요약으로 대체 (0이면 요약 사용 안 함)
+        self.full_source_files = int(os.environ.get("SUMMARY_FULL_SOURCE_FILES", 5))
+        # 같은 디렉토리의 주변 파일이 이 개수 이상이면 디렉토리 요약 하나로 묶음
+        self.directory_summary_min_files = int(os.environ.get("SUMMARY_DIRECTORY_MIN_FILES", 3))
+        # 질문 하나에서 새로 만드는 요약 수 상한 (이미 저장된 요약은 제한 없이 사용)
+        self.summary_max_new = int(os.environ.get("SUMMARY_MAX_NEW_PER_QUESTION", 5))
 
-    def analyze_files(self, files: List, feature_description: str) -> str:
-        """파일들의 코드를 분석하여 기능 구현 여부 확인"""
+    def analyze_files(self, repo_name: str, files: List[TreeEntry], feature_description: str,
+                      keywords: Optional[List[str]] = None) -> str:
+        """파일들의 코드를 분석하여 기능 구현 여부 확인 (오류는 호출한 쪽으로 전달)
+
+        keywords는 IntentRouter가 추출한 검색 토큰으로, 관련 코드 발췌와 잘라내기에 사용합니다
+        (생략하면 질문을 토큰화).
+        """
+        file_data = self._load_files(repo_name, files, feature_description, keywords)
+        if not file_data:
+            return "분석할 파일이 없습니다."
+
+        file_data, answer = self._triage(file_data, feature_description)
+        if answer is not None:
+            return answer
+
+        groups = self._plan(file_data, feature_description, keywords)
+        if len(groups) == 1:
+            # GPT 서비스를 통한 코드 분석
+            return self.gpt_service.analyze_repository(groups[0], feature_description)
+
+        findings = self._map(groups, feature_description)
+        return self.gpt_service.reduce_findings(findings, feature_description)
+
+    def analyze_files_stream(self, repo_name: str, files: List[TreeEntry], feature_description: str,
+                             keywords: Optional[List[str]] = None) -> Iterator[str]:
+        """analyze_files의 스트리밍 버전"""
+        file_data = self._load_files(repo_name, files, feature_description, keywords)
+        if not file_data:
+            yield "분석할 파일이 없습니다."
+            return
+
+        file_data, answer = self._triage(file_data, feature_description)
+        if answer is not None:
+            yield answer
+            return
+
+        groups = self._plan(file_data, feature_description, keywords)
+        if len(groups) == 1:
+            yield from self.gpt_service.stream_analysis(groups[0], feature_description)
+            return
+
+        findings = self._map(groups, feature_description)
+        yield from self.gpt_service.stream_reduce(findings, feature_description)
+
+    def _triage(self, file_data: List[Dict], feature_description: str) -> Tuple[List[Dict], Optional[str]]:
+        """저렴한 모델로 관련 파일만 남기고, 확신도가 높은 간단한 질문은 바로 답변"""
+        if not self.cascade:
+            return file_data, None
+
+        started = time.monotonic()
         try:
-            # 파일 데이터 준비
-            file_data = []
-            for file in files:
+            result = self.gpt_service.triage(file_data, feature_description)
+        except Exception as e:
+            logger.warning(f"Triage failed, analyzing all files: {str(e)}")
+            return file_data, None
+
+        if result['answer'] and result['confidence'] >= self.triage_answer_min_confidence:
+            metrics.incr("cascade.answered_by_triage")
+            return file_data, result['answer']
+
+        rank = {path: index for index, path in enumerate(result['relevant'])}
+        relevant = sorted((file for file in file_data if file['path'] in rank), key=lambda file: rank[file['path']])
+        logger.info(
+            f"Triage kept {len(relevant)}/{len(file_data)} files in {time.monotonic() - started:.2f}s"
+        )
+        metrics.incr("cascade.triage_dropped_files", len(file_data) - len(relevant))
+        # 관련 파일을 하나도 고르지 못하면 판단을 최종 모델에 맡김
+        return (relevant or file_data), None
+
+    def _load_files(self, repo_name: str, files: List[TreeEntry], feature_description: str,
+                    keywords: Optional[List[str]] = None) -> List[Dict]:
+        """상위 파일은 질문과 관련된 부분을, 나머지 주변 파일은 요약을 불러옴"""
+        if self.full_source_files > 0:
+            top_files, peripheral_files = files[:self.full_source_files], files[self.full_source_files:]
+        else:
+            top_files, peripheral_files = files, []
+
+        file_data = []
+        contents = self.github_service.get_file_contents(repo_name, top_files)
+        for file, raw in zip(top_files, contents):
+            if raw is None:
+                continue
+            try:
+                content = self._relevant_content(file, raw.decode('utf-8'), feature_description, keywords)
+                file_data.append({
+                    'path': file.path,
+                    'sha': file.sha,
+                    'content': content
+                })
+            except Exception as e:
+                logger.error(f"Error processing file {file.path}: {str(e)}")
+                continue
+        return file_data + self._load_summaries(repo_name, peripheral_files)
+
+    def _load_summaries(self, repo_name: str, files: List[TreeEntry]) -> List[Dict]:
+        """주변 파일 요약 조회 (디렉토리 단위로 묶을 수 있으면 묶음)
+
+        저장된 요약은 모두 사용하고, 요약이 없는 파일은 관련도 순으로 SUMMARY_MAX_NEW_PER_QUESTION개까지만
+        새로 만듭니다. 순위가 낮은 파일의 요약은 triage와 패킹에서 대부분 버려지므로 만들지 않습니다.
+        """
+        if not files:
+            return []
+
+        def summarize(file: TreeEntry, create: bool):
+            try:
+                return self.summary_store.get_file_summary(
+                    file.sha, file.path,
+                    lambda: self.github_service.get_file_content(repo_name, file).decode('utf-8'),
+                    create=create
+                )
+            except Exception as e:
+                logger.error(f"Error summarizing file {file.path}: {str(e)}")
+                return None
+
+        summaries = [summarize(file, create=False) for file in files]
+        missing = [index for index, summary in enumerate(summaries) if summary is None]
+        budget = max(0, self.summary_max_new)
+        created = list(self.map_executor.map(lambda index: summarize(files[index], True), missing[:budget]))
+        for index, summary in zip(missing, created):
+            summaries[index] = summary
+        budget -= len(created)
+        metrics.incr("summaries.skipped", len(missing) - len(created))
+
+        by_directory = defaultdict(list)
+        for file, summary in zip(files, summaries):
+            if summary is not None:
+                by_directory[file.path.rpartition('/')[0]].append((file.path, file.sha, summary))
+
+        file_data = []
+        for directory, entries in by_directory.items():
+            if directory and len(entries) >= self.directory_summary_min_files:
                 try:
-                    content = file.decoded_content.decode('utf-8')
-                    file_data.append({
-                        'path': file.path,
-                        'content': content
-                    })
+                    summary = self.summary_store.get_directory_summary(directory, entries, create=False)
+                    if summary is None and budget > 0:
+                        budget -= 1
+                        summary = self.summary_store.get_directory_summary(directory, entries)
+                    if summary is not None:
+                        file_data.append({'path': f"{directory}/", 'content': summary, 'summary': True})
+                        continue
                 except Exception as e:
-                    logger.error(f"Error processing file {file.path}: {str(e)}")
-                    continue
+                    logger.error(f"Error summarizing directory {directory}: {str(e)}")
+            file_data.extend(
+                {'path': path, 'sha': sha, 'content': summary, 'summary': True} for path, sha, summary in entries
+            )
+        metrics.incr("summaries.used", len(file_data))
+        return file_data
 
-            if not file_data:
-                return "분석할 파일이 없습니다."
+    def _plan(self, file_data: List[Dict], feature_description: str,
+              keywords: Optional[List[str]] = None) -> List[List[Dict]]:
+        """한 번에 분석할 파일 묶음 목록 결정 (묶음이 여러 개면 map-reduce)"""
+        if self.analysis_mode == "map_reduce":
+            return self.context_packer.split(file_data, feature_description, self.map_max_groups, keywords)
 
-            # GPT 서비스를 통한 코드 분석
-            analysis = self.gpt_service.analyze_repository(file_data)
-            return analysis
+        # 토큰 예산 안에서 관련도가 높은 파일 선택
+        packed = self.context_packer.pack(file_data, feature_description, keywords)
+        logger.info(
+            f"Packed {len(packed.files)}/{len(file_data)} files ({packed.used_tokens} tokens), "
+            f"truncated {len(packed.truncated)}, dropped {len(packed.dropped)} "
+            f"(~{packed.dropped_tokens} tokens, {packed.dropped_value:.0%} of rank value)"
+        )
+        if self.analysis_mode == "auto" and self._worth_map_reduce(packed):
+            groups = self.context_packer.split(file_data, feature_description, self.map_max_groups, keywords)
+            if len(groups) > 1:
+                logger.info(f"Context exceeds one prompt, using map-reduce over {len(groups)} groups")
+                return groups
 
-        except Exception as e:
-            logger.error(f"Error in analyze_files: {str(e)}")
-            return f"코드 분석 중 오류가 발생했습니다: {str(e)}" 
\ No newline at end of file
+        metrics.incr("context_packer.dropped_tokens", packed.dropped_tokens)
+        return [packed.files] if packed.files else self.context_packer.split(
+            file_data, feature_description, 1, keywords
+        )
+
+    def _worth_map_reduce(self, packed: PackResult) -> bool:
+        """순위가 낮은 파일 몇 개만 빠졌다면 map-reduce의 추가 호출 비용보다 얻는 것이 적음"""
+        if not (packed.dropped or packed.truncated):
+            return False
+        token_ratio = packed.dropped_tokens / max(1, packed.used_tokens + packed.dropped_tokens)
+        return (packed.dropped_value >= self.map_min_dropped_value
+                or token_ratio >= self.map_min_dropped_token_ratio)
+
+    def _map(self, groups: List[List[Dict]], feature_description: str) -> List[str]:
+        """파일 묶음들을 동시 실행 수를 제한해 병렬로 분석 (묶음 순서 유지)"""
+        findings = list(self.map_executor.map(
+            lambda group: self.gpt_service.analyze_partial(group, feature_description), groups
+        ))
+        relevant = [finding for finding in findings if finding.strip() != "No relevant code."]
+        return relevant or findings[:1]
+
+    def _relevant_content(self, file: TreeEntry, source: str, feature_description: str,
+                          keywords: Optional[List[str]] = None) -> str:
+        """질문과 관련된 심볼과 주변 코드만 추출 (관련 심볼이 없으면 파일 전체)"""
+        symbols = self.symbol_store.get_symbols(file.sha, file.path, source)
+        snippets = select_snippets(source, symbols, feature_description, keywords=keywords)
+        return snippets if snippets is not None else source
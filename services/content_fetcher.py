@@ -0,0 +1,38 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, TypeVar
+from services.github_client import is_transient_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ContentFetcher:
+    """동시 실행 수를 제한한 스레드 풀로 여러 파일 내용을 병렬 조회합니다"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.environ.get("GITHUB_FETCH_CONCURRENCY", 8))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="content-fetch")
+
+    def fetch_all(self, items: Sequence[T], fetch: Callable[[T], bytes]) -> List[Optional[bytes]]:
+        """items 순서를 유지해 결과 반환
+
+        파일 자체의 문제(404, 너무 큰 파일 등)로 실패한 항목은 None이고,
+        일시적 오류(5xx, 한도 초과, 네트워크)는 그대로 전달해 호출한 쪽(작업 재시도)이
+        불완전한 내용으로 색인·분석을 저장하지 않도록 합니다.
+        """
+        def safe_fetch(item):
+            try:
+                return fetch(item)
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                logger.error(f"Error fetching {item}: {str(e)}")
+                return None
+
+        return list(self.executor.map(safe_fetch, items))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,211 @@
+import logging
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from services.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # 정확한 토큰 수 대신 추정치를 사용
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = 6000
+# 파일 하나를 감싸는 "File: ...\n```" 형식의 토큰 수
+FILE_OVERHEAD_TOKENS = 12
+# 잘라낸 파일의 가치는 전체 파일보다 낮게 평가
+TRUNCATED_VALUE_RATIO = 0.7
+
+
+class TokenCounter:
+    """빠른 추정과 (tiktoken이 있으면) 정확한 토큰 계산"""
+
+    def __init__(self, model: str = "gpt-4"):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable for {model}: {str(e)}")
+        self._exact = {}
+
+    @staticmethod
+    def estimate(text: str) -> int:
+        """문자 종류별 평균 비율로 토큰 수 추정 (영문/코드 약 3.5자당 1토큰, 한글 약 1자당 1토큰)"""
+        non_ascii = sum(1 for char in text if ord(char) > 127)
+        return int(math.ceil((len(text) - non_ascii) / 3.5 + non_ascii * 1.2))
+
+    def count(self, text: str) -> int:
+        """정확한 토큰 수 (tiktoken이 없으면 추정치)"""
+        if self.encoding is None:
+            return self.estimate(text)
+        key = hash(text)
+        if key not in self._exact:
+            if len(self._exact) > 10000:
+                self._exact.clear()
+            self._exact[key] = len(self.encoding.encode(text, disallowed_special=()))
+        return self._exact[key]
+
+
+class PackResult(NamedTuple):
+    files: List[Dict]
+    used_tokens: int
+    truncated: List[str]
+    dropped: List[str]
+    dropped_tokens: int
+    # 잘라내거나 제외해 잃은 관련도 가치의 비율 (0~1, 순위가 높은 파일일수록 큼)
+    dropped_value: float
+
+
+def truncate_around_matches(content: str, query: str, max_tokens: int, counter: TokenCounter,
+                            keywords: Optional[Sequence[str]] = None) -> str:
+    """질의 토큰(keywords가 주어지면 그 토큰)이 등장하는 줄 주변만 남겨 max_tokens 이하로 자름"""
+    lines = content.splitlines()
+    query_tokens = set(keywords) if keywords is not None else set(tokenize(query))
+    hit_lines = [i for i, line in enumerate(lines) if query_tokens & set(tokenize(line))]
+
+    radius = 20
+    while hit_lines and radius >= 1:
+        spans = []
+        for index in hit_lines:
+            start, end = max(0, index - radius), min(len(lines), index + radius + 1)
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+            else:
+                spans.append((start, end))
+        text = "\n".join(
+            f"[lines {start + 1}-{end}]\n" + "\n".join(lines[start:end]) for start, end in spans
+        )
+        if counter.estimate(text) <= max_tokens:
+            return text
+        radius //= 2
+
+    # 일치하는 줄이 없거나 여전히 크면 앞부분만 사용
+    max_chars = int(max_tokens * 3)
+    return content[:max_chars] + "\n[truncated]"
+
+
+class ContextPacker:
+    """토큰 예산 안에서 가치가 가장 높은 파일 조합을 고릅니다 (다중 선택 배낭 문제)"""
+
+    def __init__(self, token_budget: Optional[int] = None, counter: Optional[TokenCounter] = None,
+                 buckets: int = 500):
+        self.token_budget = token_budget or int(os.environ.get("GPT_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+        self.counter = counter or TokenCounter()
+        self.buckets = buckets
+
+    def pack(self, files: Sequence[Dict], query: str, keywords: Optional[Sequence[str]] = None) -> PackResult:
+        """관련도 순으로 정렬된 files({'path', 'content'})를 예산에 맞게 선택"""
+        # 파일마다 [전체, 잘라낸 버전] 후보를 만들고 관련 순위로 가치를 매김
+        groups = []
+        for rank, file in enumerate(files):
+            value = 1.0 / (rank + 1)
+            variants = [(file['content'], value, False)]
+            full_tokens = self.counter.estimate(file['content'])
+            per_file_limit = self.token_budget // 3
+            if full_tokens > per_file_limit:
+                truncated = truncate_around_matches(
+                    file['content'], query, per_file_limit, self.counter, keywords
+                )
+                variants.append((truncated, value * TRUNCATED_VALUE_RATIO, True))
+            groups.append(variants)
+
+        # 추정치로 고른 뒤 정확한 토큰 수로 다시 확인하고, 초과하면 정확한 값으로 다시 선택
+        exact = {}
+        for _ in range(3):
+            weights = [
+                [exact.get((g, v), self.counter.estimate(text) + FILE_OVERHEAD_TOKENS)
+                 for v, (text, _, _) in enumerate(variants)]
+                for g, variants in enumerate(groups)
+            ]
+            choice = self._solve(groups, weights)
+            total = 0
+            for g, v in choice.items():
+                if (g, v) not in exact:
+                    exact[(g, v)] = self.counter.count(groups[g][v][0]) + FILE_OVERHEAD_TOKENS
+                total += exact[(g, v)]
+            if total <= self.token_budget:
+                break
+        else:
+            # 그래도 넘치면 가치 대비 토큰이 큰 파일부터 제외
+            for g, v in sorted(choice.items(), key=lambda item: groups[item[0]][item[1]][1] / exact[item]):
+                if total <= self.token_budget:
+                    break
+                total -= exact[(g, v)]
+                del choice[g]
+
+        packed, truncated, dropped = [], [], []
+        dropped_tokens = 0
+        lost_value = 0.0
+        for g, file in enumerate(files):
+            full_value = groups[g][0][1]
+            if g in choice:
+                text, value, is_truncated = groups[g][choice[g]]
+                packed.append({**file, 'content': text})
+                if is_truncated:
+                    truncated.append(file['path'])
+                    dropped_tokens += self.counter.estimate(file['content']) - self.counter.estimate(text)
+                    lost_value += full_value - value
+            else:
+                dropped.append(file['path'])
+                dropped_tokens += self.counter.estimate(file['content'])
+                lost_value += full_value
+
+        total_value = sum(variants[0][1] for variants in groups)
+        dropped_value = lost_value / total_value if total_value else 0.0
+        return PackResult(packed, total, truncated, dropped, dropped_tokens, dropped_value)
+
+    def split(self, files: Sequence[Dict], query: str, max_groups: Optional[int] = None,
+              keywords: Optional[Sequence[str]] = None) -> List[List[Dict]]:
+        """관련도 순서를 유지하며 files를 예산 크기의 묶음으로 나눔 (예산보다 큰 파일은 잘라냄)"""
+        limit = self.token_budget - FILE_OVERHEAD_TOKENS
+        groups = []
+        current, current_tokens = [], 0
+        for file in files:
+            content = file['content']
+            tokens = self.counter.estimate(content)
+            if tokens > limit:
+                content = truncate_around_matches(content, query, limit, self.counter, keywords)
+                tokens = self.counter.estimate(content)
+            tokens += FILE_OVERHEAD_TOKENS
+            if current and current_tokens + tokens > self.token_budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+                if max_groups and len(groups) >= max_groups:
+                    break
+            current.append({**file, 'content': content})
+            current_tokens += tokens
+        else:
+            if current:
+                groups.append(current)
+        return groups
+
+    def _solve(self, groups, weights) -> Dict[int, int]:
+        """그룹마다 최대 한 개의 후보를 골라 가치 합을 최대화 (용량은 버킷 단위로 근사)"""
+        granularity = max(1, self.token_budget // self.buckets)
+        capacity = self.token_budget // granularity
+        best = [0.0] * (capacity + 1)
+        picks = []
+        for g, variants in enumerate(groups):
+            new_best = best[:]
+            pick = [-1] * (capacity + 1)
+            for v, (_, value, _) in enumerate(variants):
+                w = int(math.ceil(weights[g][v] / granularity))
+                for c in range(capacity, w - 1, -1):
+                    candidate = best[c - w] + value
+                    if candidate > new_best[c]:
+                        new_best[c] = candidate
+                        pick[c] = v
+            best = new_best
+            picks.append(pick)
+
+        # 역추적
+        choice = {}
+        c = max(range(capacity + 1), key=lambda i: best[i])
+        for g in range(len(groups) - 1, -1, -1):
+            v = picks[g][c]
+            if v >= 0:
+                choice[g] = v
+                c -= int(math.ceil(weights[g][v] / granularity))
+        return choice
@@ -0,0 +1,99 @@
+import logging
+import os
+import zlib
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from services.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """네트워크 없이 동작하는 문자 n-gram 해싱 임베더"""
+
+    # 이보다 낮은 코사인 유사도는 무관한 것으로 간주
+    min_score = 0.1
+
+    def __init__(self, dim: int = 512, ngram_sizes: Tuple[int, ...] = (3, 4)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+        self.name = f"hashing-{dim}-{'-'.join(map(str, ngram_sizes))}"
+        self._features = {}
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """텍스트 목록을 L2 정규화된 float32 벡터 행렬로 변환"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            if not counts:
+                continue
+            indices = []
+            weights = []
+            for token, count in counts.items():
+                token_indices, token_signs = self._token_features(token)
+                indices.append(token_indices)
+                weights.append(token_signs * count)
+            vectors[row] = np.bincount(
+                np.concatenate(indices), weights=np.concatenate(weights), minlength=self.dim
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _token_features(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """토큰 자체와 토큰 내부 문자 n-gram의 해시 위치/부호 (토큰별로 재사용)"""
+        features = self._features.get(token)
+        if features is None:
+            padded = f"<{token}>"
+            grams = [token]
+            for size in self.ngram_sizes:
+                grams.extend(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+            hashes = np.array([zlib.crc32(gram.encode('utf-8')) for gram in grams], dtype=np.int64)
+            features = (hashes % self.dim, np.where(hashes & 0x80000000, 1.0, -1.0))
+            if len(self._features) < 500000:
+                self._features[token] = features
+        return features
+
+
+class OpenAIEmbedder:
+    """OpenAI 임베딩 API를 사용하는 임베더"""
+
+    min_score = 0.25
+
+    def __init__(self, model: str = "text-embedding-3-small", batch_size: int = 64):
+        from openai import OpenAI
+        self.client = OpenAI()
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+        self.dim = None
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """텍스트 목록을 L2 정규화된 float32 벡터 행렬로 변환"""
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text[:8000] or " " for text in texts[start:start + self.batch_size]]
+            response = self.client.embeddings.create(model=self.model, input=batch)
+            rows.extend(item.embedding for item in response.data)
+        vectors = np.asarray(rows, dtype=np.float32)
+        if self.dim is None and len(vectors):
+            self.dim = vectors.shape[1]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+EMBEDDERS: Dict[str, type] = {
+    'hashing': HashingEmbedder,
+    'openai': OpenAIEmbedder,
+}
+
+
+def create_embedder(name: str = None):
+    """EMBEDDER 환경 변수(hashing/openai)에 맞는 임베더 생성"""
+    name = name or os.environ.get("EMBEDDER", "hashing")
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {name}")
+    return EMBEDDERS[name]()
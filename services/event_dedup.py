@@ -0,0 +1,89 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeduplicator:
+    """처리한 Slack 이벤트 ID(event_id / client_msg_id)를 TTL 동안 기억해 재전송을 걸러냅니다
+
+    기본은 프로세스 내 메모리에 최대 max_entries개를 보관하고, db_path(EVENT_DEDUP_DB_PATH)가
+    주어지면 여러 워커 프로세스가 SQLite 파일을 함께 사용합니다.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                 db_path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds or float(os.environ.get("EVENT_DEDUP_TTL_SECONDS", 3600))
+        self.max_entries = max_entries or int(os.environ.get("EVENT_DEDUP_MAX_ENTRIES", 10000))
+        self.lock = threading.Lock()
+        # 키 -> 만료 시각 (TTL이 같으므로 삽입 순서가 곧 만료 순서)
+        self._seen = OrderedDict()
+        self.conn = None
+        db_path = db_path if db_path is not None else os.environ.get("EVENT_DEDUP_DB_PATH")
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_events (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self.conn.commit()
+            self._last_purge = 0.0
+
+    @staticmethod
+    def event_keys(body: Dict) -> List[str]:
+        """요청 본문에서 중복 판단에 쓸 키 목록 추출"""
+        keys = []
+        if body.get("event_id"):
+            keys.append(f"event:{body['event_id']}")
+        event = body.get("event") or {}
+        if event.get("client_msg_id"):
+            keys.append(f"msg:{event['client_msg_id']}")
+        return keys
+
+    def seen(self, keys: List[str]) -> bool:
+        """키 중 하나라도 이미 처리한 적이 있으면 True, 아니면 모두 기록하고 False"""
+        if not keys:
+            return False
+        now = time.time()
+        with self.lock:
+            while self._seen and next(iter(self._seen.values())) <= now:
+                self._seen.popitem(last=False)
+            duplicate = any(key in self._seen for key in keys)
+            if not duplicate and self.conn is not None:
+                duplicate = self._seen_shared(keys, now)
+            for key in keys:
+                self._seen[key] = now + self.ttl_seconds
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+        return duplicate
+
+    def _seen_shared(self, keys: List[str], now: float) -> bool:
+        try:
+            if now - self._last_purge > 60:
+                self.conn.execute("DELETE FROM seen_events WHERE expires_at <= ?", (now,))
+                self._last_purge = now
+            duplicate = False
+            for key in keys:
+                # 만료되지 않은 기존 키가 있으면 변경 행이 0
+                cursor = self.conn.execute(
+                    """
+                    INSERT INTO seen_events (key, expires_at) VALUES (?, ?)
+                    ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at
+                    WHERE seen_events.expires_at <= ?
+                    """,
+                    (key, now + self.ttl_seconds, now)
+                )
+                duplicate = duplicate or cursor.rowcount == 0
+            self.conn.commit()
+            return duplicate
+        except sqlite3.Error as e:
+            # 공유 저장소 장애 시 메모리 기록만으로 판단
+            logger.warning(f"Shared event de-dup store failed: {str(e)}")
+            return False
@@ -0,0 +1,39 @@
+import os
+from typing import Dict, Iterable, Optional, Tuple
+from services.intent_router import IntentMatch, IntentRouter
+
+# 사용자가 직접 쓴 메시지로 취급하는 subtype (None은 일반 메시지)
+ALLOWED_SUBTYPES = frozenset({None, "thread_broadcast"})
+
+
+class MessageEventFilter:
+    """리스너를 실행하기 전에 처리할 필요가 없는 message 이벤트를 걸러냅니다
+
+    수정·입장·파일 공유 같은 subtype, 봇 메시지, 허용 목록(SLACK_CHANNEL_ALLOWLIST) 밖의 채널,
+    IntentRouter가 의도를 찾지 못한 메시지를 제외합니다. message가 아닌 요청은 그대로 통과시킵니다.
+    """
+
+    def __init__(self, intent_router: IntentRouter, channel_allowlist: Optional[Iterable[str]] = None):
+        self.intent_router = intent_router
+        if channel_allowlist is None:
+            channel_allowlist = [
+                channel.strip() for channel in os.environ.get("SLACK_CHANNEL_ALLOWLIST", "").split(",")
+                if channel.strip()
+            ]
+        self.channel_allowlist = frozenset(channel_allowlist)
+
+    def check(self, body: Dict) -> Tuple[Optional[str], Optional[IntentMatch]]:
+        """(버려야 하면 그 사유, 처리할 message 이벤트면 판별한 의도) 반환"""
+        event = body.get("event")
+        if body.get("type") != "event_callback" or not event or event.get("type") != "message":
+            return None, None
+        if event.get("subtype") not in ALLOWED_SUBTYPES:
+            return "subtype", None
+        if event.get("bot_id"):
+            return "bot", None
+        if self.channel_allowlist and event.get("channel") not in self.channel_allowlist:
+            return "channel", None
+        intent = self.intent_router.route(event.get("text") or "")
+        if intent is None:
+            return "no_intent", None
+        return None, intent
@@ -1,6 +1,7 @@
-import requests
+from typing import Optional
 from urllib.parse import urlencode
 import os
+from .github_client import GitHubHttpClient
 from .storage_service import FileStorageService
 
 class GitHubAuthService:
@@ -9,6 +10,8 @@ class GitHubAuthService:
         self.client_secret = os.getenv('GITHUB_CLIENT_SECRET')
         self.redirect_uri = os.getenv('GITHUB_REDIRECT_URI')
         self.storage = FileStorageService()
+        # 토큰 발급 전 요청이라 인증 없이 보내고, 교환할 때마다 새 연결을 맺지 않도록 keep-alive 세션을 재사용
+        self.http = GitHubHttpClient(None)
 
     def get_oauth_url(self, state: str) -> str:
         """GitHub OAuth URL을 생성합니다"""
@@ -20,19 +23,9 @@ class GitHubAuthService:
         }
         return f"https://github.com/login/oauth/authorize?{urlencode(params)}"
 
-    def exchange_code_for_token(self, code: str, slack_user_id: str) -> str:
+    def exchange_code_for_token(self, code: str, slack_user_id: str) -> Optional[str]:
         """Authorization Code를 Access Token으로 교환하고 저장합니다"""
-        response = requests.post(
-            'https://github.com/login/oauth/access_token',
-            headers={'Accept': 'application/json'},
-            data={
-                'client_id': self.client_id,
-                'client_secret': self.client_secret,
-                'code': code
-            }
-        )
-        
-        token = response.json().get('access_token')
+        token = self.http.exchange_oauth_code(self.client_id, self.client_secret, code)
         if token:
             self.storage.save_github_token(slack_user_id, token)
         return token
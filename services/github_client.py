@@ -0,0 +1,152 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from services.http_cache import ConditionalHttpCache
+from services.metrics import metrics
+from services.rate_limiter import (
+    PRIORITY_HIGH, RateLimitScheduler, is_rate_limited, scheduler as default_scheduler
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.github.com"
+OAUTH_TOKEN_URL = "https://github.com/login/oauth/access_token"
+
+
+def is_transient_error(error: Exception) -> bool:
+    """다시 시도하면 성공할 수 있는 GitHub 오류인지 판단 (네트워크 오류, 5xx, 한도 초과)"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if not isinstance(error, requests.HTTPError) or error.response is None:
+        return False
+    response = error.response
+    # 403은 한도 초과(1차·2차)일 때만 일시적 오류이고, 권한 부족은 다시 시도해도 같음
+    return response.status_code >= 500 or is_rate_limited(response.status_code, response.headers, response.text)
+
+
+class GitHubHttpClient:
+    """keep-alive 연결을 공유하는 GitHub REST API 클라이언트 (token이 없으면 인증 없이 요청)"""
+
+    def __init__(self, token: Optional[str], base_url: Optional[str] = None,
+                 max_connections_per_host: Optional[int] = None, timeout: float = 30.0,
+                 scheduler: Optional[RateLimitScheduler] = None, max_retries: int = 3,
+                 http_cache: Optional[ConditionalHttpCache] = None):
+        self.token = token or ""
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.timeout = timeout
+        self.scheduler = scheduler or default_scheduler
+        self.max_retries = max_retries
+        self.http_cache = http_cache
+        max_connections = max_connections_per_host or int(
+            os.environ.get("GITHUB_MAX_CONNECTIONS_PER_HOST", 10)
+        )
+
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/vnd.github+json'
+        if token:
+            self.session.headers['Authorization'] = f"token {token}"
+        # 호스트별 연결 풀 크기를 제한하고, 풀이 가득 차면 대기
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, path: str, headers: Optional[Dict] = None,
+                priority: int = PRIORITY_HIGH, cacheable: bool = True, **kwargs) -> requests.Response:
+        """스케줄러를 거쳐 API 요청을 보내고 실패 상태 코드는 예외로 변환
+
+        GET 요청은 캐시된 ETag/Last-Modified로 조건부 요청을 보내고,
+        304 응답이면 캐시된 본문을 돌려줍니다 (304는 한도를 차감하지 않음).
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        kwargs.setdefault('timeout', self.timeout)
+        headers = dict(headers or {})
+
+        cached = None
+        use_cache = (self.http_cache is not None and cacheable
+                     and method == "GET" and 'params' not in kwargs)
+        if use_cache:
+            accept = headers.get('Accept', self.session.headers['Accept'])
+            cached = self.http_cache.get(self.token, url, accept)
+            headers.update(self.http_cache.conditional_headers(cached))
+
+        for attempt in range(self.max_retries + 1):
+            self.scheduler.acquire(self.token, priority)
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            retry_after = self.scheduler.record(
+                self.token, response.status_code, response.headers,
+                response.content if response.status_code == 403 else None
+            )
+            if not retry_after or attempt == self.max_retries:
+                break
+            # 스트리밍 응답은 닫아야 연결이 풀로 돌아감 (pool_block=True라 놓치면 다른 요청이 멈춤)
+            response.close()
+            time.sleep(retry_after)
+
+        if use_cache:
+            if response.status_code == 304 and cached is not None:
+                metrics.incr("github_http_cache.hit")
+                self.http_cache.touch(self.token, url, accept)
+                return self._cached_response(url, cached)
+            metrics.incr("github_http_cache.miss")
+            if response.status_code == 200:
+                self.http_cache.put(self.token, url, accept, response.headers, response.content)
+
+        if not response.ok:
+            # 오류 본문은 작으므로 읽어 두고(한도 초과 판별에 사용) 스트리밍 응답이어도 연결을 반환
+            response.content
+            response.close()
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _cached_response(url: str, cached) -> requests.Response:
+        """캐시된 본문으로 200 응답 객체 구성"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(cached.headers)
+        response._content = cached.body
+        return response
+
+    def get_json(self, path: str, **kwargs):
+        """GET 요청 후 JSON 응답 반환"""
+        return self.request("GET", path, **kwargs).json()
+
+    def get_paginated(self, path: str, **kwargs) -> List:
+        """Link 헤더를 따라 모든 페이지의 목록을 조회"""
+        items = []
+        url = path
+        while url:
+            response = self.request("GET", url, **kwargs)
+            items.extend(response.json())
+            url = response.links.get("next", {}).get("url")
+        return items
+
+    def get_blob(self, repo_name: str, sha: str, priority: int = PRIORITY_HIGH) -> bytes:
+        """blob 원본 내용을 base64 변환 없이 가져옴"""
+        response = self.request(
+            "GET", f"/repos/{repo_name}/git/blobs/{sha}",
+            headers={'Accept': 'application/vnd.github.raw'}, priority=priority,
+            cacheable=False  # blob은 BlobCache가 SHA 기준으로 보관
+        )
+        return response.content
+
+    def exchange_oauth_code(self, client_id: str, client_secret: str, code: str) -> Optional[str]:
+        """OAuth Authorization Code를 Access Token으로 교환"""
+        response = self.request(
+            "POST", OAUTH_TOKEN_URL,
+            headers={'Accept': 'application/json'},
+            data={
+                'client_id': client_id,
+                'client_secret': client_secret,
+                'code': code
+            }
+        )
+        return response.json().get('access_token')
+
+    def close(self):
+        self.session.close()
@@ -1,14 +1,39 @@
-from github import Github
 import os
-from typing import List
+from typing import Dict, List, Optional
 import logging
+from services.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW
+from services.blob_cache import BlobCache
+from services.content_fetcher import ContentFetcher
+from services.github_client import GitHubHttpClient
+from services.http_cache import ConditionalHttpCache
+from services.retrieval import FileRetriever
+from services.single_flight import SingleFlight
+from services.snapshot_ingester import SnapshotIngester
+from services.tree_index_cache import TreeIndexCache
+from services.tree_lister import TreeEntry, TreeLister
 
 logger = logging.getLogger(__name__)
 
 class GitHubService:
+    VALID_EXTENSIONS = ('.py', '.js', '.java', '.cpp', '.cs', '.php')
+
     def __init__(self):
-        self.github = None
+        self.http = None
         self.token = None
+        self.tree_lister = None
+        self.tree_cache = TreeIndexCache()
+        self.blob_cache = BlobCache()
+        self.fetcher = ContentFetcher()
+        self.http_cache = ConditionalHttpCache()
+        self.snapshot_ingester = SnapshotIngester(self.blob_cache)
+        self.retriever = FileRetriever()
+        self.candidate_pool_size = int(os.environ.get("RETRIEVAL_POOL_SIZE", 40))
+        # 이 크기(KB) 이상인 레포지토리는 tarball 스냅샷으로 한 번에 가져옴
+        snapshot_min_kb = os.environ.get("GITHUB_SNAPSHOT_MIN_REPO_KB")
+        self.snapshot_min_kb = int(snapshot_min_kb) if snapshot_min_kb else None
+        # 같은 트리 목록·blob을 동시에 요청하면 한 번만 가져와 공유
+        self.flights = SingleFlight("github")
+        self._repos = {}
 
     def has_token(self) -> bool:
         """GitHub 토큰 존재 여부 확인"""
@@ -17,47 +42,133 @@ class GitHubService:
     def set_token(self, token: str):
         """GitHub 토큰 설정"""
         self.token = token
-        self.github = Github(token)
+        if self.http:
+            self.http.close()
+        self.http = GitHubHttpClient(token, http_cache=self.http_cache)
+        self.tree_lister = TreeLister(self.http)
+        self._repos = {}
 
     def get_oauth_url(self) -> str:
         """GitHub OAuth URL 생성"""
         client_id = os.environ.get("GITHUB_CLIENT_ID")
         return f"https://github.com/login/oauth/authorize?client_id={client_id}&scope=repo"
 
-    def get_repositories(self) -> List:
+    def get_repositories(self) -> List[Dict]:
         """사용자의 레포지토리 목록 조회"""
-        if not self.github:
-            raise Exception("GitHub 토큰이 설정되지 않았습니다.")
-        return list(self.github.get_user().get_repos())
+        return self._require_http().get_paginated("/user/repos?per_page=100")
 
-    def get_potential_files(self, repo_name: str, feature_description: str) -> List:
-        """기능이 구현되어 있을 만한 파일 목록 조회"""
-        if not self.github:
-            raise Exception("GitHub 토큰이 설정되지 않았습니다.")
+    def get_potential_files(self, repo_name: str, feature_description: str,
+                            commit_sha: Optional[str] = None,
+                            keywords: Optional[List[str]] = None) -> List[TreeEntry]:
+        """기능이 구현되어 있을 만한 파일 목록 조회 (키워드·벡터 검색 관련도 순)
+
+        commit_sha를 생략하면 기본 브랜치의 최신 커밋을 사용합니다.
+        keywords는 IntentRouter가 추출한 검색 토큰입니다 (생략하면 질문을 토큰화).
+        """
+        commit_sha = commit_sha or self.get_head_sha(repo_name)
+        if self.retriever.needs_build(repo_name, commit_sha):
+            sources = [
+                entry for entry in self._list_files_at(repo_name, commit_sha)
+                if self._is_source_file(entry.path)
+            ]
+            # 변경되지 않은 blob은 이전 커밋에서 받아둔 캐시(스냅샷 모드면 tarball로 채운 캐시)에서 읽고,
+            # 캐시에 없는 파일만 사용자 요청 몫의 한도를 남겨두도록 낮은 우선순위로 조회
+            contents = self.get_file_contents(repo_name, sources, priority=PRIORITY_LOW)
+            self.retriever.build(repo_name, commit_sha, sources, contents)
 
-        repo = self.github.get_repo(repo_name)
-        contents = repo.get_contents("")
-        potential_files = []
+        # 개수 제한 대신 후보를 넉넉히 반환하고, 실제 선택은 토큰 예산 기준으로 CodeAnalyzer가 수행
+        return self.retriever.retrieve(
+            repo_name, commit_sha, feature_description, self.candidate_pool_size, keywords=keywords
+        )
 
-        while contents:
-            file_content = contents.pop(0)
-            if file_content.type == "dir":
-                contents.extend(repo.get_contents(file_content.path))
+    def list_files(self, repo_name: str, commit_sha: Optional[str] = None) -> List[TreeEntry]:
+        """커밋(기본값: 기본 브랜치 최신 커밋)의 파일 목록 조회 (커밋 SHA 기준 캐시 사용)"""
+        return self._list_files_at(repo_name, commit_sha or self.get_head_sha(repo_name))
+
+    def _list_files_at(self, repo_name: str, commit_sha: str) -> List[TreeEntry]:
+        entries = self.tree_cache.get(repo_name, commit_sha)
+        if entries is None:
+            entries = self.flights.do(
+                ("tree", repo_name, commit_sha), lambda: self._load_files_at(repo_name, commit_sha)
+            )
+        return entries
+
+    def _load_files_at(self, repo_name: str, commit_sha: str) -> List[TreeEntry]:
+        # 다른 프로세스가 먼저 채웠을 수 있으므로 캐시를 다시 확인
+        entries = self.tree_cache.get(repo_name, commit_sha)
+        if entries is None:
+            if self._use_snapshot(repo_name):
+                entries = self.ingest_snapshot(repo_name, commit_sha)
             else:
-                if self._is_potential_file(file_content.name, feature_description):
-                    potential_files.append(file_content)
+                entries = self.tree_lister.list_files(repo_name, commit_sha)
+                self.tree_cache.put(repo_name, commit_sha, entries)
+        return entries
+
+    def ingest_snapshot(self, repo_name: str, commit_sha: str, archive_path: Optional[str] = None,
+                        priority: int = PRIORITY_HIGH) -> List[TreeEntry]:
+        """커밋의 tarball을 스트리밍으로 받아 소스 파일을 blob 캐시와 트리 인덱스에 채움
+
+        archive_path가 주어지면 GitHub 대신 로컬 tarball 파일을 읽습니다.
+        트리 인덱스에는 소스 파일(VALID_EXTENSIONS)만 기록됩니다.
+        """
+        if archive_path:
+            with open(archive_path, 'rb') as f:
+                entries = self.snapshot_ingester.ingest(f, self._is_source_file)
+        else:
+            response = self._require_http().request(
+                "GET", f"/repos/{repo_name}/tarball/{commit_sha}",
+                priority=priority, cacheable=False, stream=True
+            )
+            try:
+                response.raw.decode_content = True
+                entries = self.snapshot_ingester.ingest(response.raw, self._is_source_file)
+            finally:
+                response.close()
 
-        return potential_files[:20]  # 최대 20개 파일만 반환
+        self.tree_cache.put(repo_name, commit_sha, entries)
+        return entries
 
-    def _is_potential_file(self, filename: str, feature_description: str) -> bool:
-        """파일이 해당 기능을 포함할 가능성이 있는지 확인"""
-        # 파일 확장자 체크
-        valid_extensions = ['.py', '.js', '.java', '.cpp', '.cs', '.php']
-        if not any(filename.endswith(ext) for ext in valid_extensions):
+    def get_head_sha(self, repo_name: str) -> str:
+        """기본 브랜치의 최신 커밋 SHA 조회"""
+        branch = self._get_repo(repo_name)["default_branch"]
+        ref = self._require_http().get_json(f"/repos/{repo_name}/git/ref/heads/{branch}")
+        return ref["object"]["sha"]
+
+    def get_file_content(self, repo_name: str, entry: TreeEntry, priority: int = PRIORITY_HIGH) -> bytes:
+        """파일(blob)의 내용을 조회 (blob SHA 기준 캐시 사용)"""
+        content = self.blob_cache.get(entry.sha)
+        if content is not None:
+            return content
+        return self.flights.do(("blob", entry.sha), lambda: self.blob_cache.get_or_fetch(
+            entry.sha, lambda: self._fetch_blob(repo_name, entry.sha, priority)
+        ))
+
+    def get_file_contents(self, repo_name: str, entries: List[TreeEntry],
+                          priority: int = PRIORITY_HIGH) -> List[Optional[bytes]]:
+        """여러 파일 내용을 병렬로 조회 (entries 순서 유지, 실패한 파일은 None)"""
+        return self.fetcher.fetch_all(entries, lambda entry: self.get_file_content(repo_name, entry, priority))
+
+    def _fetch_blob(self, repo_name: str, sha: str, priority: int = PRIORITY_HIGH) -> bytes:
+        """GitHub에서 blob 내용을 가져옴"""
+        return self._require_http().get_blob(repo_name, sha, priority)
+
+    def _get_repo(self, repo_name: str) -> Dict:
+        """레포지토리 정보 조회 (프로세스 내 재사용)"""
+        if repo_name not in self._repos:
+            self._repos[repo_name] = self._require_http().get_json(f"/repos/{repo_name}")
+        return self._repos[repo_name]
+
+    def _use_snapshot(self, repo_name: str) -> bool:
+        if self.snapshot_min_kb is None:
             return False
+        return self._get_repo(repo_name).get("size", 0) >= self.snapshot_min_kb
+
+    def _require_http(self) -> GitHubHttpClient:
+        if not self.http:
+            raise Exception("GitHub 토큰이 설정되지 않았습니다.")
+        return self.http
 
-        # 파일명과 기능 설명의 연관성 체크
-        keywords = feature_description.lower().split()
-        filename_lower = filename.lower()
-        
-        return any(keyword in filename_lower for keyword in keywords) 
\ No newline at end of file
+    @classmethod
+    def _is_source_file(cls, filename: str) -> bool:
+        """분석 대상 확장자인지 확인"""
+        return filename.endswith(cls.VALID_EXTENSIONS)
@@ -1,49 +1,318 @@
 from openai import OpenAI
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
+import json
+import logging
+import os
+import time
+from services.context_packer import TokenCounter
+from services.llm_client import ResilientChatClient
+from services.metrics import metrics
+from services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트 내용을 바꾸면 올려서 이전 응답 캐시를 무효화
+PROMPT_VERSION = "2"
+# 분류(triage) 단계에 파일마다 보여줄 최대 글자 수
+TRIAGE_PREVIEW_CHARS = 1500
 
 class GPTService:
     def __init__(self):
-        self.client = OpenAI()
+        # 재시도는 ResilientChatClient가 기한 안에서 직접 처리
+        self.client = OpenAI(max_retries=0)
+        self.completions = ResilientChatClient(self.client)
+        self.model = os.environ.get("OPENAI_ANALYSIS_MODEL", "gpt-4")
+        self.triage_model = os.environ.get("OPENAI_TRIAGE_MODEL", "gpt-3.5-turbo")
+        self.summary_model = os.environ.get("OPENAI_SUMMARY_MODEL", "gpt-3.5-turbo")
+        self.response_cache = ResponseCache()
     
-    def analyze_repository(self, files: List[Dict]) -> str:
+    def analyze_repository(self, files: List[Dict], question: str = "") -> str:
         # 파일 내용을 하나의 문맥으로 결합
         context = self._prepare_context(files)
-        
-        response = self.client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                # Updated system prompt with detailed instructions
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an AI assistant specialized in reading code, determining whether certain features "
-                        "have been implemented, and providing expert-level code feedback. You have access to relevant "
-                        "code snippets or entire code files. Your job is to:\n\n"
-                        "1. Identify whether a feature request or specification is implemented in the provided code.\n"
-                        "2. Summarize the findings accurately.\n"
-                        "3. Provide constructive, clear, and actionable feedback on how to improve the code, if necessary.\n\n"
-                        "When responding, follow this structure:\n"
-                        "1) Implementation Status: Is the feature fully implemented, partially, or not at all?\n"
-                        "2) Detailed Explanation: Summarize the relevant parts of the code or logic.\n"
-                        "3) Feedback / Suggestions: Provide concise tips for improvement.\n\n"
-                        "Be concise but thorough, and stay within the provided code context. Use a professional tone, "
-                        "and if anything is ambiguous, highlight what is missing. Avoid speculation beyond the given snippets."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"다음 코드들을 분석하여 기의 구현 여부와 구현 상태를 설명해주세요.\n\n{context}"
-                    )
-                }
-            ]
+        return self._complete("analysis", context, question, self._build_messages(context, question))
+
+    def stream_analysis(self, files: List[Dict], question: str = "") -> Iterator[str]:
+        """analyze_repository의 스트리밍 버전 (생성되는 텍스트 조각을 순서대로 반환)"""
+        context = self._prepare_context(files)
+        yield from self._stream("analysis", context, question, self._build_messages(context, question))
+
+    def analyze_partial(self, files: List[Dict], question: str = "") -> str:
+        """전체 코드 중 일부 파일 묶음에서 질문과 관련된 사실만 추출 (map 단계)"""
+        context = self._prepare_context(files)
+        return self._complete("map", context, question, self._build_map_messages(context, question))
+
+    def reduce_findings(self, findings: List[str], question: str = "") -> str:
+        """파일 묶음별 분석 결과를 종합해 최종 답변 생성 (reduce 단계)"""
+        context = self._prepare_findings(findings)
+        return self._complete("reduce", context, question, self._build_reduce_messages(context, question))
+
+    def stream_reduce(self, findings: List[str], question: str = "") -> Iterator[str]:
+        """reduce_findings의 스트리밍 버전"""
+        context = self._prepare_findings(findings)
+        yield from self._stream("reduce", context, question, self._build_reduce_messages(context, question))
+
+    def triage(self, files: List[Dict], question: str = "") -> Dict:
+        """저렴한 모델로 관련 파일을 고르고, 쉽게 판단되는 질문이면 바로 답변 (cascade 1단계)
+
+        반환값: {'relevant': [경로...], 'answer': 답변 또는 None, 'confidence': 0~1}
+        """
+        context = self._prepare_triage_context(files)
+        raw = self._complete("triage", context, question, self._build_triage_messages(context, question),
+                             model=self.triage_model)
+        try:
+            result = json.loads(raw[raw.index('{'):raw.rindex('}') + 1])
+            relevant = [path for path in result.get('relevant') or [] if isinstance(path, str)]
+            answer = result.get('answer') or None
+            confidence = float(result.get('confidence') or 0.0)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Unparseable triage response, keeping all files: {str(e)}")
+            return {'relevant': [file['path'] for file in files], 'answer': None, 'confidence': 0.0}
+        return {'relevant': relevant, 'answer': answer, 'confidence': confidence}
+
+    def summarize_file(self, path: str, content: str) -> str:
+        """파일 하나의 역할과 주요 심볼을 요약"""
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "Summarize the given source file for another engineer in at most 5 short sentences: "
+                    "its responsibility, the main classes/functions and what they do, and the features "
+                    "it implements. Mention identifiers verbatim."
+                )
+            },
+            {
+                "role": "user",
+                "content": f"File: {path}\n```\n{content[:20000]}\n```"
+            }
+        ]
+        return self._complete("file_summary", content, path, messages, model=self.summary_model)
+
+    def summarize_directory(self, path: str, file_summaries: List[Tuple[str, str]]) -> str:
+        """디렉토리에 속한 파일 요약들을 모아 디렉토리 요약 생성"""
+        context = "\n\n".join(f"{file_path}: {summary}" for file_path, summary in file_summaries)
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "Summarize what the given directory of source files is responsible for in at most 5 short "
+                    "sentences, based on the per-file summaries. Mention key identifiers verbatim."
+                )
+            },
+            {
+                "role": "user",
+                "content": f"Directory: {path}\n\n{context}"
+            }
+        ]
+        return self._complete("dir_summary", context, path, messages, model=self.summary_model)
+
+    def _complete(self, kind: str, context: str, question: str, messages: List[Dict],
+                  model: Optional[str] = None) -> str:
+        model = model or self.model
+        # 같은 모델·프롬프트·코드·질문이면 저장된 응답 재사용
+        cache_key = self.response_cache.make_key(model, f"{PROMPT_VERSION}/{kind}", context, question)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        started = time.monotonic()
+        response = self.completions.create(
+            model=model,
+            messages=messages
         )
-        
-        return response.choices[0].message.content
-    
+
+        analysis = response.choices[0].message.content
+        usage = response.usage
+        self._log_call(kind, model, time.monotonic() - started,
+                       usage.prompt_tokens if usage else None, usage.completion_tokens if usage else None,
+                       cached_tokens=self._cached_tokens(usage))
+        self.response_cache.put(cache_key, analysis)
+        return analysis
+
+    def _stream(self, kind: str, context: str, question: str, messages: List[Dict],
+                model: Optional[str] = None) -> Iterator[str]:
+        model = model or self.model
+        cache_key = self.response_cache.make_key(model, f"{PROMPT_VERSION}/{kind}", context, question)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        started = time.monotonic()
+        stream = self.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            # openai==1.0.0에는 stream_options 인자가 없어 요청 본문에 직접 넣음
+            extra_body={"stream_options": {"include_usage": True}}
+        )
+        parts = []
+        first_token = None
+        usage = None
+        for chunk in stream:
+            # usage는 choices가 비어 있는 마지막 청크에만 실려 옴
+            usage = self._chunk_usage(chunk) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                parts.append(delta)
+                yield delta
+
+        text = "".join(parts)
+        if usage is not None:
+            self._log_call(kind, model, time.monotonic() - started,
+                           self._usage_field(usage, 'prompt_tokens'),
+                           self._usage_field(usage, 'completion_tokens'),
+                           first_token, self._cached_tokens(usage))
+        else:
+            # usage를 돌려주지 않는 엔드포인트라면 토큰 수는 추정치
+            self._log_call(kind, model, time.monotonic() - started,
+                           sum(TokenCounter.estimate(message['content']) for message in messages),
+                           TokenCounter.estimate(text), first_token)
+        self.response_cache.put(cache_key, text)
+
+    def _log_call(self, kind: str, model: str, elapsed: float, prompt_tokens: Optional[int],
+                  completion_tokens: Optional[int], first_token: Optional[float] = None,
+                  cached_tokens: Optional[int] = None):
+        """단계별 모델 호출 지연 시간과 토큰 수 기록"""
+        logger.info(
+            f"LLM {kind} model={model} latency={elapsed:.2f}s"
+            + (f" first_token={first_token:.2f}s" if first_token is not None else "")
+            + f" prompt_tokens={prompt_tokens} completion_tokens={completion_tokens}"
+            + (f" cached_tokens={cached_tokens}" if cached_tokens is not None else "")
+        )
+        metrics.incr(f"llm.{kind}.cached_tokens", cached_tokens or 0)
+        metrics.incr(f"llm.{kind}.calls")
+        metrics.incr(f"llm.{kind}.latency_ms", int(elapsed * 1000))
+        metrics.incr(f"llm.{kind}.prompt_tokens", prompt_tokens or 0)
+        metrics.incr(f"llm.{kind}.completion_tokens", completion_tokens or 0)
+
+    @staticmethod
+    def _chunk_usage(chunk):
+        """스트림 청크의 usage (구버전 SDK에서는 model_extra에 dict로 들어옴)"""
+        usage = getattr(chunk, 'usage', None)
+        if usage is None and getattr(chunk, 'model_extra', None):
+            usage = chunk.model_extra.get('usage')
+        return usage
+
+    @staticmethod
+    def _usage_field(usage, name: str) -> Optional[int]:
+        if isinstance(usage, dict):
+            return usage.get(name)
+        return getattr(usage, name, None)
+
+    @staticmethod
+    def _cached_tokens(usage) -> Optional[int]:
+        """usage에 포함된 prefix 캐시 적중 토큰 수 (지원하지 않는 응답이면 None)"""
+        if isinstance(usage, dict):
+            return (usage.get('prompt_tokens_details') or {}).get('cached_tokens')
+        details = getattr(usage, 'prompt_tokens_details', None)
+        if details is None and usage is not None and getattr(usage, 'model_extra', None):
+            details = usage.model_extra.get('prompt_tokens_details')
+        if isinstance(details, dict):
+            return details.get('cached_tokens')
+        return getattr(details, 'cached_tokens', None)
+
+    def _build_triage_messages(self, context: str, question: str) -> List[Dict]:
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You are triaging code for a more capable reviewer. Given a question about a feature and "
+                    "previews or summaries of candidate files, respond with JSON only, in the form "
+                    "{\"relevant\": [file paths], \"answer\": string or null, \"confidence\": number}.\n"
+                    "- \"relevant\": paths of the files the reviewer needs to answer the question, most relevant "
+                    "first. Use the paths exactly as given.\n"
+                    "- \"answer\": only if the question is trivially decidable from the previews alone (for "
+                    "example, it is not about this code at all), a complete answer in Korean; otherwise null.\n"
+                    "- \"confidence\": how certain you are of the answer, from 0 to 1."
+                )
+            },
+            {
+                "role": "user",
+                "content": f"{context}\n질문: {question}"
+            }
+        ]
+
+    def _build_messages(self, context: str, question: str) -> List[Dict]:
+        return [
+            # Updated system prompt with detailed instructions
+            {
+                "role": "system",
+                "content": (
+                    "You are an AI assistant specialized in reading code, determining whether certain features "
+                    "have been implemented, and providing expert-level code feedback. You have access to relevant "
+                    "code snippets or entire code files. Your job is to:\n\n"
+                    "1. Identify whether a feature request or specification is implemented in the provided code.\n"
+                    "2. Summarize the findings accurately.\n"
+                    "3. Provide constructive, clear, and actionable feedback on how to improve the code, if necessary.\n\n"
+                    "When responding, follow this structure:\n"
+                    "1) Implementation Status: Is the feature fully implemented, partially, or not at all?\n"
+                    "2) Detailed Explanation: Summarize the relevant parts of the code or logic.\n"
+                    "3) Feedback / Suggestions: Provide concise tips for improvement.\n\n"
+                    "Be concise but thorough, and stay within the provided code context. Use a professional tone, "
+                    "and if anything is ambiguous, highlight what is missing. Avoid speculation beyond the given snippets."
+                )
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"다음 코드들을 분석하여 기능의 구현 여부와 구현 상태를 설명해주세요.\n\n{context}\n"
+                    f"질문: {question}"
+                )
+            }
+        ]
+
+    def _build_map_messages(self, context: str, question: str) -> List[Dict]:
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You are an AI assistant specialized in reading code. You are given one part of a larger "
+                    "codebase. Extract only the facts relevant to the question: which parts of the feature are "
+                    "implemented here (with file paths and function/class names), what appears to be missing, "
+                    "and any notable issues. Be concise and factual. If nothing in this part is relevant, "
+                    "answer exactly \"No relevant code.\""
+                )
+            },
+            {
+                "role": "user",
+                "content": f"{context}\n질문: {question}"
+            }
+        ]
+
+    def _build_reduce_messages(self, context: str, question: str) -> List[Dict]:
+        system_prompt = self._build_messages("", question)[0]
+        return [
+            system_prompt,
+            {
+                "role": "user",
+                "content": (
+                    "코드베이스가 커서 여러 부분으로 나누어 분석한 결과입니다. "
+                    f"이 결과들을 종합하여 기능의 구현 여부와 구현 상태를 설명해주세요.\n\n{context}\n\n"
+                    f"질문: {question}"
+                )
+            }
+        ]
+
+    def _prepare_triage_context(self, files: List[Dict]) -> str:
+        return self._prepare_context([
+            {**file, 'content': file['content'][:TRIAGE_PREVIEW_CHARS]} for file in files
+        ])
+
+    def _prepare_findings(self, findings: List[str]) -> str:
+        return "\n\n".join(f"Part {index + 1}:\n{finding}" for index, finding in enumerate(findings))
+
     def _prepare_context(self, files: List[Dict]) -> str:
+        # provider 측 prefix 캐시가 적용되도록 파일은 항상 경로·SHA 순서로 배치
         context = []
-        for file in files:
-            content = f"File: {file['path']}\n```\n{file['content']}\n```\n"
+        for file in sorted(files, key=lambda file: (file['path'], file.get('sha', ''))):
+            if file.get('summary'):
+                # 주변 파일은 원본 대신 요약만 전달
+                content = f"Summary of {file['path']}:\n{file['content']}\n"
+            else:
+                content = f"File: {file['path']}\n```\n{file['content']}\n```\n"
             context.append(content)
         return "\n".join(context)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ConditionalHttpCache:
+    """URL·토큰별 ETag/Last-Modified와 응답 본문을 SQLite에 LRU 방식으로 저장합니다
+
+    항목 수(HTTP_CACHE_MAX_ENTRIES)나 본문 크기 합(HTTP_CACHE_MAX_BYTES)을 넘으면
+    가장 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+
+    # 재검증 응답(304)에서 갱신되지 않도록 저장하지 않는 헤더
+    EXCLUDED_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'connection'}
+
+    def __init__(self, db_path: str = "data/cache/http_cache.sqlite3", max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.db_path = db_path
+        self.max_entries = max_entries or int(os.environ.get("HTTP_CACHE_MAX_ENTRIES", 5000))
+        self.max_bytes = max_bytes or int(os.environ.get("HTTP_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                token_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                accept TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (token_id, url, accept)
+            )
+            """
+        )
+        # updated_at은 저장·재검증(304) 시각, 즉 마지막 사용 시각이므로 LRU 기준으로 사용
+        self.conn.execute("CREATE INDEX IF NOT EXISTS http_cache_updated ON http_cache (updated_at)")
+        self.conn.commit()
+
+    def get(self, token: str, url: str, accept: str) -> Optional[CachedResponse]:
+        """저장된 응답 조회 (없으면 None)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, headers, body FROM http_cache "
+                "WHERE token_id = ? AND url = ? AND accept = ?",
+                (self._token_id(token), url, accept)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(row[0], row[1], json.loads(row[2]), bytes(row[3]))
+
+    def put(self, token: str, url: str, accept: str, headers, body: bytes):
+        """검증자(ETag/Last-Modified)가 있는 응답만 저장하고 한도를 넘으면 오래 사용되지 않은 항목부터 삭제"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        stored_headers = {
+            key: value for key, value in headers.items()
+            if key.lower() not in self.EXCLUDED_HEADERS and not key.lower().startswith("x-ratelimit")
+        }
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(token_id, url, accept, etag, last_modified, headers, body, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._token_id(token), url, accept, etag, last_modified,
+                 json.dumps(stored_headers), sqlite3.Binary(body), time.time())
+            )
+            self.conn.execute(
+                "DELETE FROM http_cache WHERE rowid IN ("
+                "SELECT rowid FROM http_cache ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.execute(
+                "DELETE FROM http_cache WHERE rowid IN ("
+                "SELECT rowid FROM (SELECT rowid, SUM(LENGTH(body)) OVER (ORDER BY updated_at DESC) AS total "
+                "FROM http_cache) WHERE total > ?)",
+                (self.max_bytes,)
+            )
+            self.conn.commit()
+
+    def touch(self, token: str, url: str, accept: str):
+        """재검증에 성공한 항목의 갱신 시각 기록"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE http_cache SET updated_at = ? WHERE token_id = ? AND url = ? AND accept = ?",
+                (time.time(), self._token_id(token), url, accept)
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def conditional_headers(cached: Optional[CachedResponse]) -> Dict[str, str]:
+        """재검증 요청에 붙일 조건부 헤더"""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    @staticmethod
+    def _token_id(token: Optional[str]) -> str:
+        # 토큰 원문은 저장하지 않음
+        return hashlib.sha256((token or "").encode('utf-8')).hexdigest()
@@ -0,0 +1,155 @@
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from services.search_index import tokenize
+
+# 질문에 자주 나오는 한국어 기능 이름을 코드에서 쓰이는 영어 식별자 토큰으로 확장
+FEATURE_SYNONYMS = {
+    "로그인": ("login", "signin", "auth"),
+    "로그아웃": ("logout", "signout"),
+    "회원가입": ("signup", "register"),
+    "인증": ("auth", "authentication", "token"),
+    "권한": ("permission", "role", "authorization"),
+    "비밀번호": ("password",),
+    "사용자": ("user",),
+    "회원": ("user", "member"),
+    "결제": ("payment", "pay", "checkout"),
+    "주문": ("order",),
+    "장바구니": ("cart",),
+    "상품": ("product", "item"),
+    "검색": ("search", "query"),
+    "알림": ("notification", "notify"),
+    "업로드": ("upload",),
+    "다운로드": ("download",),
+    "파일": ("file",),
+    "이미지": ("image",),
+    "댓글": ("comment",),
+    "게시글": ("post", "article"),
+    "게시판": ("board", "post"),
+    "채팅": ("chat", "message"),
+    "메시지": ("message",),
+    "이메일": ("email", "mail"),
+    "캐시": ("cache",),
+    "설정": ("config", "settings"),
+    "데이터베이스": ("database", "db"),
+    "페이지네이션": ("pagination", "page"),
+    "웹훅": ("webhook",),
+}
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    # 메시지에서 찾은 의도 트리거 키워드
+    triggers: List[str]
+    # 검색에 넘길 토큰 (메시지 토큰 + 동의어 확장)
+    keywords: List[str]
+
+
+class KeywordAutomaton:
+    """여러 키워드를 텍스트 한 번 순회로 모두 찾는 Aho-Corasick 오토마톤 (대소문자 무시)"""
+
+    def __init__(self, keywords: Dict[str, object]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, object]]] = [[]]
+        for keyword, value in keywords.items():
+            self._add(keyword.lower(), value)
+        self._link()
+
+    def _add(self, keyword: str, value):
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append((keyword, value))
+
+    def _link(self):
+        # 루트의 자식은 실패 시 루트로 돌아가고, 나머지는 너비 우선으로 실패 링크 계산
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[str, object]]:
+        """텍스트에 등장하는 (키워드, 값) 목록 (등장 순서)"""
+        matches = []
+        state = 0
+        for char in text.lower():
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            matches.extend(self._output[state])
+        return matches
+
+
+class IntentRouter:
+    """모든 의도 트리거(동의어 포함)와 기능 동의어를 하나의 오토마톤으로 묶어 메시지를 한 번에 분류합니다
+
+    의도는 등록한 순서가 우선순위이며, 메시지 토큰과 동의어 확장 결과를 함께 돌려주어
+    검색 단계가 메시지를 다시 토큰화하지 않도록 합니다.
+    """
+
+    def __init__(self, synonyms: Dict[str, Sequence[str]] = FEATURE_SYNONYMS):
+        self.synonyms = synonyms
+        self._intents: List[str] = []
+        self._triggers: Dict[str, List[str]] = {}
+        self._handlers: Dict[str, Callable] = {}
+        self._automaton: Optional[KeywordAutomaton] = None
+
+    def intent(self, name: str, triggers: Sequence[str]):
+        """의도와 트리거 키워드를 등록하는 데코레이터 (꾸민 함수가 그 의도의 핸들러)"""
+        def register(handler: Callable) -> Callable:
+            self.add_intent(name, triggers, handler)
+            return handler
+        return register
+
+    def add_intent(self, name: str, triggers: Sequence[str], handler: Optional[Callable] = None):
+        if name not in self._triggers:
+            self._intents.append(name)
+        self._triggers[name] = list(triggers)
+        if handler is not None:
+            self._handlers[name] = handler
+        self._automaton = None
+
+    def route(self, text: str) -> Optional[IntentMatch]:
+        """메시지의 의도 판별 (어떤 트리거도 없으면 None)"""
+        found = {}
+        expansions = []
+        for keyword, (kind, value) in self._get_automaton().find(text):
+            if kind == "intent":
+                found.setdefault(value, []).append(keyword)
+            else:
+                expansions.extend(value)
+
+        intent = next((name for name in self._intents if name in found), None)
+        if intent is None:
+            return None
+        keywords = list(dict.fromkeys(tokenize(text) + expansions))
+        return IntentMatch(intent, found[intent], keywords)
+
+    def dispatch(self, match: IntentMatch, **kwargs):
+        """판별한 의도의 핸들러 실행 (핸들러에는 match와 kwargs를 전달)"""
+        handler = self._handlers.get(match.intent)
+        if handler is None:
+            raise ValueError(f"No handler registered for intent: {match.intent}")
+        return handler(match=match, **kwargs)
+
+    def _get_automaton(self) -> KeywordAutomaton:
+        if self._automaton is None:
+            keywords = {}
+            for name in reversed(self._intents):
+                for trigger in self._triggers[name]:
+                    keywords[trigger.lower()] = ("intent", name)
+            for word, expansion in self.synonyms.items():
+                keywords.setdefault(word.lower(), ("synonym", tuple(expansion)))
+            self._automaton = KeywordAutomaton(keywords)
+        return self._automaton
@@ -0,0 +1,188 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from services.job_store import JobStore
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대기 시간 상한
+MAX_RETRY_DELAY_SECONDS = 600.0
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업이 한도에 도달했을 때 발생"""
+
+
+class Job:
+    """실행 중인 작업 (payload와 완료한 단계 결과)"""
+
+    def __init__(self, store: JobStore, record: Dict):
+        self.store = store
+        self.id = record['id']
+        self.kind = record['kind']
+        self.payload = record['payload']
+        self.stages = record['stages']
+        self.attempts = record['attempts']
+
+    def stage(self, name: str, run: Callable):
+        """단계를 실행하고 결과를 기록 (이미 완료한 단계면 기록된 결과 반환)
+
+        결과는 JSON으로 저장되므로 JSON 직렬화가 가능한 값이어야 합니다.
+        """
+        if name in self.stages:
+            metrics.incr(f"jobs.stage_resumed.{name}")
+            return self.stages[name]
+        started = time.monotonic()
+        result = run()
+        metrics.incr(f"jobs.stage_ms.{name}", int((time.monotonic() - started) * 1000))
+        self.store.save_stage(self.id, name, result)
+        self.stages[name] = result
+        return result
+
+
+class JobQueue:
+    """Slack 핸들러가 바로 반환할 수 있도록 오래 걸리는 작업을 워커 스레드에서 실행합니다
+
+    작업은 종류(kind)와 payload(dict)로 JobStore에 기록되고, 종류별 핸들러가 Job을 받아 실행합니다.
+    실패한 작업은 지수 대기 후 완료한 단계 다음부터 다시 실행하고, 한도를 넘기거나
+    다시 시도해도 소용없는 오류(retryable이 False)면 dead letter로 옮깁니다.
+    대기열 길이, 대기 시간, 실행 시간은 metrics(/metrics)로 노출됩니다.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: Optional[int] = None,
+                 max_size: Optional[int] = None, max_attempts: Optional[int] = None,
+                 retry_base_seconds: Optional[float] = None, poll_interval: float = 1.0):
+        self.store = store or JobStore()
+        self.workers = workers or int(os.environ.get("JOB_WORKERS", 4))
+        self.max_size = max_size or int(os.environ.get("JOB_QUEUE_MAX_SIZE", 100))
+        self.max_attempts = max_attempts or int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+        self.retry_base_seconds = retry_base_seconds or float(os.environ.get("JOB_RETRY_BASE_SECONDS", 5))
+        self.poll_interval = poll_interval
+        self.condition = threading.Condition()
+        self._handlers = {}
+        self._failure_handlers = {}
+        self._retryable = {}
+        self._threads = []
+
+    def register(self, kind: str, handler: Callable[[Job], None],
+                 on_failure: Optional[Callable[[Job, Exception], None]] = None,
+                 retryable: Optional[Callable[[Exception], bool]] = None):
+        """작업 종류별 실행 함수 등록
+
+        on_failure는 작업을 포기할 때 호출되고, retryable은 다시 시도할 오류인지 판단합니다
+        (생략하면 모든 오류를 재시도).
+        """
+        self._handlers[kind] = handler
+        if on_failure:
+            self._failure_handlers[kind] = on_failure
+        if retryable:
+            self._retryable[kind] = retryable
+
+    def start(self):
+        """이전 프로세스가 남긴 작업을 되살리고 워커 스레드 시작"""
+        if not self._threads:
+            recovered = self.store.recover()
+            if recovered:
+                logger.info(f"Resuming {recovered} interrupted jobs")
+        for index in range(len(self._threads), self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, kind: str, payload: Dict) -> str:
+        """작업을 기록하고 작업 ID를 즉시 반환"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self.depth() >= self.max_size:
+            metrics.incr("jobs.rejected")
+            raise JobQueueFull()
+        job_id = self.store.add(kind, payload)
+        metrics.incr("jobs.enqueued")
+        metrics.set_gauge("jobs.queue_depth", self.depth())
+        with self.condition:
+            self.condition.notify()
+        return job_id
+
+    def depth(self) -> int:
+        return self.store.count_queued()
+
+    def _work(self):
+        while True:
+            try:
+                record = self.store.claim()
+            except Exception as e:
+                logger.error(f"Failed to claim job: {str(e)}")
+                record = None
+            if record is None:
+                with self.condition:
+                    self.condition.wait(timeout=self.poll_interval)
+                continue
+            self._run(Job(self.store, record), record['next_run_at'])
+
+    def _run(self, job: Job, scheduled_at: float):
+        metrics.set_gauge("jobs.queue_depth", self.depth())
+        wait_ms = int(max(0.0, time.time() - scheduled_at) * 1000)
+        metrics.incr("jobs.wait_ms", wait_ms)
+        metrics.set_gauge("jobs.last_wait_ms", wait_ms)
+        started = time.monotonic()
+        # 단계 하나가 임대 시간보다 오래 걸려도 다른 워커가 가져가지 않도록 실행 중에는 임대를 계속 연장
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job.id, stop_heartbeat), name=f"job-heartbeat-{job.id[:8]}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            self._handlers[job.kind](job)
+            self.store.complete(job.id)
+            metrics.incr("jobs.completed")
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            stop_heartbeat.set()
+            run_ms = int((time.monotonic() - started) * 1000)
+            metrics.incr("jobs.run_ms", run_ms)
+            metrics.set_gauge("jobs.last_run_ms", run_ms)
+
+    def _heartbeat(self, job_id: str, stop: threading.Event):
+        while not stop.wait(self.store.lease_seconds / 3):
+            try:
+                self.store.renew_lease(job_id)
+            except Exception as e:
+                logger.warning(f"Failed to renew lease for job {job_id}: {str(e)}")
+
+    def _fail(self, job: Job, error: Exception):
+        attempt = job.attempts + 1
+        retryable = self._retryable.get(job.kind)
+        if retryable is not None and not retryable(error):
+            # 같은 입력이면 다시 실행해도 같은 오류가 나므로 바로 포기
+            logger.error(f"Job {job.id} ({job.kind}) failed with a non-retryable error, moving to dead letters: "
+                         f"{str(error)}")
+            metrics.incr("jobs.not_retryable")
+            self._dead_letter(job, error)
+            return
+        if attempt >= self.max_attempts:
+            logger.error(f"Job {job.id} ({job.kind}) failed {attempt} times, moving to dead letters: {str(error)}")
+            self._dead_letter(job, error)
+            return
+
+        delay = min(MAX_RETRY_DELAY_SECONDS, self.retry_base_seconds * 2 ** job.attempts)
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(
+            f"Job {job.id} ({job.kind}) failed (attempt {attempt}), retrying in {delay:.0f}s: {str(error)}"
+        )
+        self.store.retry(job.id, str(error), delay)
+        metrics.incr("jobs.retried")
+
+    def _dead_letter(self, job: Job, error: Exception):
+        self.store.dead_letter(job.id, str(error))
+        metrics.incr("jobs.dead_lettered")
+        on_failure = self._failure_handlers.get(job.kind)
+        if on_failure:
+            try:
+                on_failure(job, error)
+            except Exception as e:
+                logger.error(f"Failure handler for job {job.id} failed: {str(e)}")
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """작업 대기열을 SQLite(WAL)에 보관해 프로세스가 재시작되어도 작업을 잃지 않습니다
+
+    작업마다 완료한 단계의 결과(stages)를 기록해 재시작 후 마지막 완료 단계부터 이어서 실행하고,
+    재시도 한도를 넘긴 작업은 dead_letters 테이블로 옮깁니다.
+    """
+
+    def __init__(self, db_path: str = "data/jobs.sqlite3", lease_seconds: Optional[float] = None):
+        self.db_path = db_path
+        # 실행 중인 작업이 이 시간 동안 진행이 없으면 다른 워커가 가져갈 수 있음
+        self.lease_seconds = lease_seconds or float(os.environ.get("JOB_LEASE_SECONDS", 600))
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # 작업 선점은 BEGIN IMMEDIATE로 직접 트랜잭션을 관리
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stages TEXT NOT NULL DEFAULT '{}',
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner_pid INTEGER,
+                lease_until REAL,
+                next_run_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_next_run ON jobs (state, next_run_at)")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stages TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                failed_at REAL NOT NULL
+            )
+            """
+        )
+
+    def add(self, kind: str, payload: Dict) -> str:
+        """새 작업 등록 후 작업 ID 반환"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, payload, state, next_run_at, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now)
+            )
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """실행할 차례인 작업 하나를 선점 (대기 중이거나 임대 시간이 지난 실행 중 작업)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    """
+                    SELECT id, kind, payload, stages, attempts, next_run_at, created_at FROM jobs
+                    WHERE (state = 'queued' AND next_run_at <= ?) OR (state = 'running' AND lease_until <= ?)
+                    ORDER BY next_run_at LIMIT 1
+                    """,
+                    (now, now)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE jobs SET state = 'running', owner_pid = ?, lease_until = ? WHERE id = ?",
+                        (os.getpid(), now + self.lease_seconds, row[0])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'payload': json.loads(row[2]),
+            'stages': json.loads(row[3]),
+            'attempts': row[4],
+            'next_run_at': row[5],
+            'created_at': row[6]
+        }
+
+    def save_stage(self, job_id: str, stage: str, result):
+        """완료한 단계 결과 기록 (임대 시간도 연장)"""
+        with self.lock:
+            row = self.conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row[0])
+            stages[stage] = result
+            self.conn.execute(
+                "UPDATE jobs SET stages = ?, lease_until = ? WHERE id = ?",
+                (json.dumps(stages), time.time() + self.lease_seconds, job_id)
+            )
+
+    def renew_lease(self, job_id: str):
+        """실행 중인 작업의 임대 시간 연장 (실행 중 하트비트)"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND state = 'running'",
+                (time.time() + self.lease_seconds, job_id)
+            )
+
+    def complete(self, job_id: str):
+        """완료된 작업 삭제"""
+        with self.lock:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: str, error: str, delay: float):
+        """실패한 작업을 delay초 뒤에 다시 실행하도록 예약 (완료한 단계는 유지)"""
+        with self.lock:
+            self.conn.execute(
+                """
+                UPDATE jobs SET state = 'queued', attempts = attempts + 1, last_error = ?,
+                    next_run_at = ?, owner_pid = NULL, lease_until = NULL
+                WHERE id = ?
+                """,
+                (error, time.time() + delay, job_id)
+            )
+
+    def dead_letter(self, job_id: str, error: str):
+        """재시도 한도를 넘긴 작업을 dead_letters로 이동"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO dead_letters
+                        (id, kind, payload, stages, attempts, last_error, created_at, failed_at)
+                    SELECT id, kind, payload, stages, attempts + 1, ?, created_at, ? FROM jobs WHERE id = ?
+                    """,
+                    (error, time.time(), job_id)
+                )
+                self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def recover(self) -> int:
+        """종료된 프로세스가 실행하던 작업을 대기 상태로 되돌림 (재시작 직후 호출)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, owner_pid FROM jobs WHERE state = 'running'").fetchall()
+            orphaned = [job_id for job_id, pid in rows if not self._is_alive(pid)]
+            for job_id in orphaned:
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner_pid = NULL, lease_until = NULL WHERE id = ?",
+                    (job_id,)
+                )
+        return len(orphaned)
+
+    def count_queued(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+    def dead_letters(self, limit: int = 50) -> List[Dict]:
+        """최근 dead letter 목록 조회"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, attempts, last_error, failed_at FROM dead_letters "
+                "ORDER BY failed_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {
+                'id': row[0],
+                'kind': row[1],
+                'payload': json.loads(row[2]),
+                'attempts': row[3],
+                'last_error': row[4],
+                'failed_at': row[5]
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _is_alive(pid: Optional[int]) -> bool:
+        if not pid or pid == os.getpid():
+            # 현재 프로세스 pid가 기록되어 있다면 재시작 전 같은 pid를 쓰던 프로세스의 작업
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
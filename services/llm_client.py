@@ -0,0 +1,220 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional
+import httpx
+import openai
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대기 시간 (지수 증가, full jitter)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+# 헤지 기준 지연 시간을 계산하기 위한 최소 표본 수
+HEDGE_MIN_SAMPLES = 20
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI 호출이 기한 안에 성공하지 못했거나 회로 차단 중일 때 발생"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    def __init__(self):
+        super().__init__("분석 서비스가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.")
+
+
+class CircuitBreaker:
+    """연속 실패가 쌓이면 일정 시간 동안 호출을 즉시 거부 (이후 한 번의 시험 호출로 회복 확인)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or int(os.environ.get("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+        self.reset_timeout = reset_timeout or float(os.environ.get("LLM_CIRCUIT_RESET_SECONDS", 30))
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self) -> bool:
+        """지금 호출을 보내도 되는지 확인"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info("LLM circuit closed")
+                metrics.set_gauge("llm.circuit_open", 0)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self.failures} failures")
+                    metrics.incr("llm.circuit_opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+            metrics.set_gauge("llm.circuit_open", 1 if self.state == self.OPEN else 0)
+
+
+class LatencyTracker:
+    """모델별 최근 응답 시간 분포"""
+
+    def __init__(self, window: int = 200):
+        self.lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, elapsed: float):
+        with self.lock:
+            self._samples[model].append(elapsed)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """표본이 충분하면 해당 백분위 지연 시간, 아니면 None"""
+        with self.lock:
+            samples = sorted(self._samples[model])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+
+class ResilientChatClient:
+    """chat.completions.create를 기한, 재시도, 헤지 요청, 회로 차단기로 감쌉니다
+
+    429/5xx/타임아웃/연결 오류는 기한 안에서 jitter를 준 지수 대기로 재시도하고,
+    헤지를 켜면 스트리밍이 아닌 호출이 최근 p95 지연 시간을 넘길 때 같은 요청을 한 번 더 보내
+    먼저 성공한 응답을 사용합니다. 스트림을 읽는 중에 끊긴 연결이나 SSE 오류 이벤트는
+    회로 차단기에 실패로 기록하고 LLMUnavailableError로 바꿔 전달합니다.
+    """
+
+    def __init__(self, client, deadline: Optional[float] = None, max_retries: Optional[int] = None,
+                 hedge: Optional[bool] = None, hedge_percentile: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.deadline = deadline or float(os.environ.get("LLM_DEADLINE_SECONDS", 120))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("LLM_MAX_RETRIES", 3))
+        self.hedge = hedge if hedge is not None else os.environ.get("LLM_HEDGE", "false").lower() == "true"
+        self.hedge_percentile = hedge_percentile or float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.95))
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+        self.hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+    def create(self, **kwargs):
+        """client.chat.completions.create와 같은 인자로 호출"""
+        if not self.breaker.allow():
+            metrics.incr("llm.circuit_rejected")
+            raise CircuitOpenError()
+
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                response = self._attempt(kwargs, remaining)
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # 요청 자체의 문제(4xx)는 upstream 장애로 보지 않음
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or delay >= deadline_at - time.monotonic():
+                    metrics.incr("llm.failed")
+                    raise LLMUnavailableError(f"OpenAI 호출 실패 ({attempt + 1}회 시도): {str(e)}") from e
+                if not self.breaker.allow():
+                    metrics.incr("llm.circuit_rejected")
+                    raise CircuitOpenError() from e
+                logger.warning(f"Retrying LLM call in {delay:.1f}s after {type(e).__name__}: {str(e)}")
+                metrics.incr("llm.retries")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            if kwargs.get('stream'):
+                return self._guard_stream(response)
+            return response
+
+    def _guard_stream(self, stream) -> Iterator:
+        # openai 클라이언트는 스트림을 읽는 중 발생한 httpx·SSE 오류를 감싸지 않으므로 여기서 장애로 기록
+        try:
+            yield from stream
+        except (httpx.HTTPError, httpx.StreamError, openai.APIError) as e:
+            self.breaker.record_failure()
+            metrics.incr("llm.stream_failed")
+            raise LLMUnavailableError(f"OpenAI 스트림 중단: {type(e).__name__}: {str(e)}") from e
+
+    def _attempt(self, kwargs, timeout: float):
+        model = kwargs.get('model', '')
+        threshold = None
+        if self.hedge and not kwargs.get('stream'):
+            threshold = self.latencies.percentile(model, self.hedge_percentile)
+        if threshold is None or threshold >= timeout:
+            return self._call(kwargs, timeout)
+
+        started = time.monotonic()
+        primary = self.hedge_executor.submit(self._call, kwargs, timeout)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        metrics.incr("llm.hedge.sent")
+        hedged = self.hedge_executor.submit(self._call, kwargs, timeout - (time.monotonic() - started))
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        metrics.incr("llm.hedge.won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _call(self, kwargs, timeout: float):
+        started = time.monotonic()
+        response = self.client.chat.completions.create(timeout=max(timeout, 1.0), **kwargs)
+        if not kwargs.get('stream'):
+            self.latencies.record(kwargs.get('model', ''), time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def _backoff(attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
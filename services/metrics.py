@@ -0,0 +1,32 @@
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """프로세스 내 카운터/게이지 저장소 (/metrics 엔드포인트로 노출)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    def incr(self, name: str, value: int = 1):
+        """카운터 증가"""
+        with self.lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """게이지 값 설정"""
+        with self.lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> Dict:
+        """현재 모든 지표 값 조회"""
+        with self.lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges)
+            }
+
+
+metrics = Metrics()
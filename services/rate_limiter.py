@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Mapping, Optional
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 요청 우선순위 (값이 작을수록 먼저 처리)
+PRIORITY_HIGH = 0  # 사용자 질문 처리
+PRIORITY_LOW = 1   # 프리페치, 인덱싱 등 백그라운드 작업
+
+DEFAULT_LIMIT = 5000
+
+
+def is_rate_limited(status_code: int, headers: Mapping[str, str], body=None) -> bool:
+    """한도 초과 응답인지 판단 (403은 권한 부족일 수 있으므로 한도 초과 표시가 있을 때만)"""
+    if status_code == 429:
+        return True
+    if status_code != 403:
+        return False
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='ignore')
+    return (headers.get("Retry-After") is not None
+            or headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in (body or "").lower())
+
+
+class _TokenBudget:
+    def __init__(self):
+        self.limit = DEFAULT_LIMIT
+        self.remaining = DEFAULT_LIMIT
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.high_waiters = 0
+
+
+class RateLimitScheduler:
+    """토큰별 GitHub API 잔여 한도를 추적해 요청 시점을 조절합니다"""
+
+    def __init__(self, low_priority_reserve: Optional[float] = None, max_wait: float = 900.0):
+        # 잔여 한도가 이 비율 이하로 떨어지면 낮은 우선순위 요청은 리셋까지 대기
+        self.low_priority_reserve = low_priority_reserve if low_priority_reserve is not None else float(
+            os.environ.get("GITHUB_RATE_LIMIT_RESERVE", 0.2)
+        )
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self._budgets = {}
+
+    def acquire(self, token: str, priority: int = PRIORITY_HIGH):
+        """요청을 보내도 될 때까지 대기한 뒤 한도 1개를 예약"""
+        waiting = False
+        try:
+            while True:
+                delay = self._reserve(token, priority, waiting)
+                if delay <= 0:
+                    return
+                waiting = True
+                time.sleep(delay)
+        finally:
+            if waiting:
+                self._done_waiting(token, priority)
+
+    def record(self, token: str, status_code: int, headers: Mapping[str, str], body=None) -> float:
+        """응답 헤더로 잔여 한도를 갱신하고, 한도 초과 응답이면 재시도까지 대기할 시간 반환
+
+        body는 403 응답이 2차 한도인지 권한 부족인지 구분하는 데 사용합니다.
+        """
+        now = time.time()
+        with self.lock:
+            budget = self._budget(token)
+            if headers.get("X-RateLimit-Remaining") is not None:
+                budget.remaining = int(headers["X-RateLimit-Remaining"])
+                budget.limit = int(headers.get("X-RateLimit-Limit", budget.limit))
+                budget.reset_at = float(headers.get("X-RateLimit-Reset", budget.reset_at))
+
+            retry_after = 0.0
+            # 권한 부족 403(비공개 레포, scope, SSO)으로 토큰 전체를 막지 않도록 한도 초과 응답만 대기
+            if is_rate_limited(status_code, headers, body):
+                if headers.get("Retry-After") is not None:
+                    # 2차 한도(secondary rate limit) 응답
+                    retry_after = float(headers["Retry-After"])
+                elif budget.remaining == 0 and budget.reset_at > now:
+                    retry_after = budget.reset_at - now
+                else:
+                    # Retry-After 없는 2차 한도는 1분 대기
+                    retry_after = 60.0
+                if retry_after:
+                    budget.blocked_until = max(budget.blocked_until, now + retry_after)
+                    logger.warning(f"GitHub rate limited, retry after {retry_after:.1f}s")
+
+            self._report(token, budget)
+            return min(retry_after, self.max_wait)
+
+    def remaining(self, token: str) -> int:
+        """토큰의 현재 잔여 한도"""
+        with self.lock:
+            return self._budget(token).remaining
+
+    def _reserve(self, token: str, priority: int, waiting: bool) -> float:
+        """한도를 예약하면 0, 아니면 다시 확인하기까지 대기할 시간 반환"""
+        now = time.time()
+        with self.lock:
+            budget = self._budget(token)
+            if budget.reset_at and now >= budget.reset_at:
+                budget.remaining = budget.limit
+                budget.reset_at = 0.0
+
+            delay = 0.0
+            if budget.blocked_until > now:
+                delay = budget.blocked_until - now
+            elif budget.remaining <= 0:
+                delay = budget.reset_at - now if budget.reset_at > now else 1.0
+            elif priority > PRIORITY_HIGH:
+                if budget.remaining <= budget.limit * self.low_priority_reserve and budget.reset_at > now:
+                    delay = budget.reset_at - now
+                elif budget.high_waiters:
+                    # 대기 중인 높은 우선순위 요청에 순서를 양보
+                    delay = 0.05
+
+            if delay > 0:
+                if priority == PRIORITY_HIGH and not waiting:
+                    budget.high_waiters += 1
+                return min(delay, self.max_wait)
+
+            budget.remaining -= 1
+            self._report(token, budget)
+            return 0.0
+
+    def _done_waiting(self, token: str, priority: int):
+        if priority == PRIORITY_HIGH:
+            with self.lock:
+                self._budget(token).high_waiters -= 1
+
+    def _budget(self, token: str) -> _TokenBudget:
+        if token not in self._budgets:
+            self._budgets[token] = _TokenBudget()
+        return self._budgets[token]
+
+    @staticmethod
+    def _report(token: str, budget: _TokenBudget):
+        token_id = hashlib.sha1(token.encode('utf-8')).hexdigest()[:8]
+        metrics.set_gauge(f"github_rate_limit_remaining.{token_id}", budget.remaining)
+
+
+scheduler = RateLimitScheduler()
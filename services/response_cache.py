@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """대소문자·공백·끝 문장부호 차이를 없앤 질문"""
+    normalized = unicodedata.normalize("NFKC", question).lower()
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return normalized.strip(" ?!.。？！")
+
+
+class ResponseCache:
+    """분석 응답을 SQLite에 TTL·LRU 방식으로 보관합니다"""
+
+    def __init__(self, db_path: str = "data/cache/responses.sqlite3", ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds or int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 86400))
+        self.max_entries = max_entries or int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, context: str, question: str) -> str:
+        """모델·프롬프트 버전·컨텍스트 해시·정규화된 질문으로 캐시 키 생성"""
+        context_hash = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        raw = "\0".join([model, prompt_version, context_hash, normalize_question(question)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """만료되지 않은 응답 조회 (없으면 None)"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] + self.ttl_seconds < now:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                row = None
+            if row is None:
+                metrics.incr("response_cache.miss")
+                return None
+
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        metrics.incr("response_cache.hit")
+        return row[0]
+
+    def put(self, key: str, response: str):
+        """응답을 저장하고 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
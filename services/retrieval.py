@@ -0,0 +1,76 @@
+import logging
+import os
+from typing import Dict, List, Optional, Sequence
+from services.embedders import create_embedder
+from services.search_index import SearchIndexStore
+from services.single_flight import SingleFlight
+from services.tree_lister import TreeEntry
+from services.vector_index import VectorIndexStore
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal Rank Fusion 상수
+RRF_K = 60
+
+
+class FileRetriever:
+    """BM25 키워드 검색과 벡터 검색 결과를 합쳐 관련 파일을 고릅니다"""
+
+    def __init__(self, search_indexes: Optional[SearchIndexStore] = None,
+                 vector_indexes: Optional[VectorIndexStore] = None, use_vectors: Optional[bool] = None):
+        self.search_indexes = search_indexes or SearchIndexStore()
+        if use_vectors is None:
+            use_vectors = os.environ.get("VECTOR_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+        self.vector_indexes = (vector_indexes or VectorIndexStore(create_embedder())) if use_vectors else None
+        # 같은 커밋의 색인을 동시에 만들면 서로의 임시 파일과 행렬을 지우므로 한 번만 생성
+        self.flights = SingleFlight("index")
+
+    def needs_build(self, repo_name: str, commit_sha: str) -> bool:
+        """해당 커밋의 색인이 없어 파일 내용이 필요한지 확인"""
+        if self.search_indexes.get(repo_name, commit_sha) is None:
+            return True
+        return self.vector_indexes is not None and self.vector_indexes.get(repo_name, commit_sha) is None
+
+    def build(self, repo_name: str, commit_sha: str, entries: Sequence[TreeEntry],
+              contents: Sequence[Optional[bytes]]):
+        """소스 파일 목록과 내용으로 색인 생성 (같은 커밋의 동시 생성은 하나로 병합)"""
+        self.flights.do(
+            ("index", repo_name, commit_sha), lambda: self._build(repo_name, commit_sha, entries, contents)
+        )
+
+    def _build(self, repo_name: str, commit_sha: str, entries: Sequence[TreeEntry],
+               contents: Sequence[Optional[bytes]]):
+        # 기다리는 동안 먼저 끝난 생성이 있으면 색인별로 다시 확인해 건너뜀
+        if self.search_indexes.get(repo_name, commit_sha) is None:
+            self.search_indexes.build(repo_name, commit_sha, entries, contents)
+        if self.vector_indexes is not None and self.vector_indexes.get(repo_name, commit_sha) is None:
+            self.vector_indexes.build(repo_name, commit_sha, entries, contents)
+
+    def retrieve(self, repo_name: str, commit_sha: str, query: str, k: int, pool: int = 50,
+                 keywords: Optional[Sequence[str]] = None) -> List[TreeEntry]:
+        """두 검색 결과를 순위 기반으로 융합해 상위 k개 파일 반환
+
+        keywords가 주어지면 질의를 다시 토큰화하지 않고 키워드 검색과 벡터 질의에 사용합니다.
+        """
+        bm25 = self.search_indexes.get(repo_name, commit_sha)
+        if keywords is None:
+            rankings = [[entry for entry, _ in bm25.search(query, pool)]]
+        else:
+            rankings = [[entry for entry, _ in bm25.search_tokens(keywords, pool)]]
+
+        vectors = self.vector_indexes.get(repo_name, commit_sha) if self.vector_indexes else None
+        if vectors is not None:
+            # 한국어 질문도 코드 식별자와 가까워지도록 동의어로 확장한 키워드를 임베딩
+            query_vector = self.vector_indexes.embed_query(" ".join(keywords) if keywords else query)
+            by_key = {(entry.path, entry.sha): entry for entry in bm25.docs}
+            rankings.append([
+                by_key[(entry.path, entry.sha)]
+                for entry, score in vectors.search_files(query_vector, pool)
+                if (entry.path, entry.sha) in by_key and score >= self.vector_indexes.embedder.min_score
+            ])
+
+        scores: Dict[TreeEntry, float] = {}
+        for ranking in rankings:
+            for rank, entry in enumerate(ranking):
+                scores[entry] = scores.get(entry, 0.0) + 1.0 / (RRF_K + rank + 1)
+        return sorted(scores, key=scores.get, reverse=True)[:k]
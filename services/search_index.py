@@ -0,0 +1,150 @@
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from services.tree_lister import TreeEntry
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+|[가-힣]+")
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# 경로 토큰은 본문 토큰보다 이만큼 가중
+PATH_BOOST = 3
+# 이보다 큰 파일은 경로만 색인
+MAX_INDEXED_BYTES = 512 * 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """식별자를 snake_case/camelCase 단위로 나누어 소문자 토큰 목록으로 변환"""
+    tokens = []
+    for word in WORD_PATTERN.findall(text):
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = [part.lower() for chunk in word.split("_") for part in CAMEL_PATTERN.findall(chunk)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """파일 경로·내용·식별자에 대한 BM25 역색인"""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, docs: List[TreeEntry], doc_lengths: List[int], postings: Dict[str, List[Tuple[int, int]]]):
+        self.docs = docs
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, entries: Sequence[TreeEntry], contents: Sequence[Optional[bytes]]) -> "BM25Index":
+        """파일 목록과 내용으로 색인 생성 (내용이 없는 파일은 경로만 색인)"""
+        postings = {}
+        doc_lengths = []
+        for doc_id, (entry, content) in enumerate(zip(entries, contents)):
+            counts = Counter()
+            for token in tokenize(entry.path):
+                counts[token] += PATH_BOOST
+            if content is not None and len(content) <= MAX_INDEXED_BYTES:
+                counts.update(tokenize(content.decode('utf-8', errors='ignore')))
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((doc_id, tf))
+            doc_lengths.append(sum(counts.values()))
+        return cls(list(entries), doc_lengths, postings)
+
+    def search(self, query: str, k: int) -> List[Tuple[TreeEntry, float]]:
+        """질의와 가장 관련 있는 상위 k개 파일과 점수 반환 (점수 0인 파일 제외)"""
+        return self.search_tokens(tokenize(query), k)
+
+    def search_tokens(self, query_tokens: Sequence[str], k: int) -> List[Tuple[TreeEntry, float]]:
+        scores = {}
+        doc_count = len(self.docs)
+        for token in set(query_tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[doc_id], score) for doc_id, score in top]
+
+    def to_dict(self) -> Dict:
+        return {
+            'docs': [list(doc) for doc in self.docs],
+            'doc_lengths': self.doc_lengths,
+            'postings': self.postings
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BM25Index":
+        postings = {token: [tuple(item) for item in items] for token, items in data['postings'].items()}
+        return cls([TreeEntry(*doc) for doc in data['docs']], data['doc_lengths'], postings)
+
+
+class SearchIndexStore:
+    """(레포지토리, 커밋 SHA) 단위로 BM25 색인을 메모리와 디스크에 보관합니다"""
+
+    def __init__(self, cache_dir: str = "data/cache/search", max_in_memory: int = 8):
+        self.cache_dir = cache_dir
+        self.max_in_memory = max_in_memory
+        self.lock = threading.Lock()
+        self._indexes = OrderedDict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, repo_name: str, commit_sha: str) -> Optional[BM25Index]:
+        """저장된 색인 조회 (없으면 None)"""
+        key = self._key(repo_name, commit_sha)
+        with self.lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+
+        try:
+            with open(self._path_for(key), 'r') as f:
+                index = BM25Index.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return None
+
+        self._remember(key, index)
+        return index
+
+    def build(self, repo_name: str, commit_sha: str, entries: Sequence[TreeEntry],
+              contents: Sequence[Optional[bytes]]) -> BM25Index:
+        """색인을 생성해 저장"""
+        index = BM25Index.build(entries, contents)
+        key = self._key(repo_name, commit_sha)
+        path = self._path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp_path, path)
+
+        self._remember(key, index)
+        logger.info(f"Built search index for {repo_name}@{commit_sha} ({len(entries)} files)")
+        return index
+
+    def _remember(self, key: str, index: BM25Index):
+        with self.lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_in_memory:
+                self._indexes.popitem(last=False)
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _key(repo_name: str, commit_sha: str) -> str:
+        return hashlib.sha1(f"{repo_name}@{commit_sha}".encode('utf-8')).hexdigest()
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Hashable, Optional, Tuple, TypeVar
+from services.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows에서는 프로세스 내 병합만 사용
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 프로세스 간 잠금 파일 수 상한 (키 해시 앞 3자리로 분산)
+LOCK_SHARD_CHARS = 3
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """같은 키의 작업이 진행 중이면 새로 실행하지 않고 첫 실행의 결과를 기다려 공유합니다
+
+    lock_dir가 주어지면(SINGLE_FLIGHT_LOCK_DIR) 키별 파일 잠금으로 다른 워커 프로세스의
+    같은 작업이 끝날 때까지 기다린 뒤 실행합니다. 이때 결과는 각 단계의 디스크 캐시
+    (트리 인덱스, blob, 응답 캐시)에서 재사용됩니다.
+    """
+
+    def __init__(self, name: str, lock_dir: Optional[str] = None):
+        self.name = name
+        self.lock_dir = lock_dir if lock_dir is not None else os.environ.get("SINGLE_FLIGHT_LOCK_DIR") or None
+        if self.lock_dir and fcntl is None:
+            logger.warning("fcntl unavailable, single-flight is limited to this process")
+            self.lock_dir = None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """fn을 키당 한 번만 실행하고 결과 반환 (실패하면 기다리던 호출에도 같은 예외 발생)"""
+        return self.do_shared(key, fn)[0]
+
+    def do_shared(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """do와 같지만 다른 호출의 결과를 공유받았는지 여부도 함께 반환"""
+        with self.lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.incr(f"single_flight.{self.name}.shared")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            with self._process_lock(key):
+                call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    @contextmanager
+    def _process_lock(self, key: Hashable):
+        if not self.lock_dir:
+            yield
+            return
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:LOCK_SHARD_CHARS]
+        with open(os.path.join(self.lock_dir, f"{self.name}-{digest}.lock"), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from slack_sdk.errors import SlackApiError
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 최종 갱신이 rate limit으로 실패했을 때 다시 시도할 횟수
+FINAL_UPDATE_RETRIES = 3
+
+
+class UpdateLimiter:
+    """프로세스 안의 모든 스트리머가 chat.update 호출 한도(Tier 3, 분당 약 50회)를 함께 나눠 씁니다
+
+    중간 갱신은 차례가 아니면 건너뛰고(누적 텍스트는 다음 갱신에 반영), 최종 갱신은 차례를 기다립니다.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        per_minute = per_minute or float(os.environ.get("SLACK_UPDATES_PER_MINUTE", 50))
+        self.interval = 60.0 / per_minute
+        self.lock = threading.Lock()
+        self._next_at = 0.0
+
+    def try_acquire(self) -> bool:
+        """지금 호출할 수 있으면 차례를 차지하고 True"""
+        with self.lock:
+            now = time.monotonic()
+            if now < self._next_at:
+                return False
+            self._next_at = now + self.interval
+            return True
+
+    def acquire(self):
+        """차례가 올 때까지 대기"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def block(self, seconds: float):
+        """rate limit 응답을 받으면 모든 스트리머의 갱신을 Retry-After 동안 멈춤"""
+        with self.lock:
+            self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+update_limiter = UpdateLimiter()
+
+
+class SlackMessageStreamer:
+    """메시지 하나를 먼저 올리고, 생성되는 텍스트를 모아 chat.update로 갱신합니다
+
+    ts가 주어지면 새 메시지를 올리지 않고 이미 게시한 메시지를 이어서 갱신합니다 (작업 재시도 시).
+    chat.update 호출은 프로세스 공용 UpdateLimiter로 전체 호출 수를 제한합니다.
+    """
+
+    def __init__(self, client, channel: str, thread_ts: Optional[str] = None, prefix: str = "",
+                 placeholder: str = "분석 중입니다... :hourglass_flowing_sand:",
+                 min_interval: Optional[float] = None, ts: Optional[str] = None,
+                 limiter: Optional[UpdateLimiter] = None):
+        self.client = client
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.prefix = prefix
+        self.placeholder = placeholder
+        self.limiter = limiter or update_limiter
+        # 메시지 하나의 갱신 간격 (전체 호출 수는 limiter가 제한)
+        self.min_interval = min_interval if min_interval is not None else float(
+            os.environ.get("SLACK_STREAM_UPDATE_INTERVAL", 1.0)
+        )
+        self.ts = ts
+        self.text = ""
+        self._last_update = 0.0
+        self._last_sent = None
+
+    def start(self) -> str:
+        """자리 표시 메시지를 게시하고 메시지 ts 반환 (기존 메시지가 있으면 자리 표시로 되돌림)"""
+        if self.ts is not None:
+            self._update(self.placeholder)
+            return self.ts
+        response = self.client.chat_postMessage(
+            channel=self.channel, thread_ts=self.thread_ts, text=self.placeholder
+        )
+        self.ts = response["ts"]
+        self._last_update = time.monotonic()
+        return self.ts
+
+    def append(self, delta: str):
+        """텍스트 조각을 누적하고, 마지막 갱신 후 일정 시간이 지났으면 메시지 갱신"""
+        self.text += delta
+        if time.monotonic() - self._last_update >= self.min_interval:
+            self._update(f"{self.prefix}{self.text} :writing_hand:")
+
+    def finish(self):
+        """누적된 전체 텍스트로 메시지를 최종 갱신"""
+        self._update(f"{self.prefix}{self.text}", final=True)
+
+    def fail(self, message: str):
+        """오류 메시지로 최종 갱신 (이미 받은 텍스트는 유지)"""
+        text = f"{self.prefix}{self.text}\n\n{message}" if self.text else message
+        self._update(text, final=True)
+
+    def _update(self, text: str, final: bool = False):
+        if self.ts is None or text == self._last_sent:
+            return
+        if final:
+            self._update_final(text)
+            return
+        if not self.limiter.try_acquire():
+            # 다른 메시지가 호출 한도를 쓰는 중이면 건너뜀 (누적 텍스트는 다음 갱신에 반영)
+            metrics.incr("slack_stream.updates_skipped")
+            return
+        try:
+            self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+            self._last_sent = text
+        except Exception as e:
+            # 중간 갱신 실패(rate limit 등)는 다음 갱신에 누적 텍스트가 반영되므로 무시
+            logger.warning(f"Slack chat.update failed: {str(e)}")
+            self._backoff(e)
+        finally:
+            self._last_update = time.monotonic()
+
+    def _update_final(self, text: str):
+        """최종 텍스트는 반드시 반영되도록 rate limit이면 Retry-After만큼 기다렸다 다시 시도"""
+        for attempt in range(FINAL_UPDATE_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+                self._last_sent = text
+                return
+            except SlackApiError as e:
+                retry_after = self._backoff(e)
+                if retry_after is None or attempt == FINAL_UPDATE_RETRIES:
+                    raise
+                logger.warning(f"Slack chat.update rate limited, retrying final update in {retry_after:.0f}s")
+                time.sleep(retry_after)
+            finally:
+                self._last_update = time.monotonic()
+
+    def _backoff(self, error: Exception) -> Optional[float]:
+        """rate limit 응답이면 공용 limiter를 멈추고 대기 시간 반환 (아니면 None)"""
+        if not isinstance(error, SlackApiError) or error.response.status_code != 429:
+            return None
+        headers = {key.lower(): value for key, value in (error.response.headers or {}).items()}
+        retry_after = headers.get("retry-after")
+        retry_after = float(retry_after[0] if isinstance(retry_after, list) else retry_after or 1)
+        metrics.incr("slack_stream.rate_limited")
+        self.limiter.block(retry_after)
+        return retry_after
@@ -0,0 +1,43 @@
+import hashlib
+import logging
+import tarfile
+from typing import BinaryIO, Callable, List
+from services.blob_cache import BlobCache
+from services.tree_lister import TreeEntry
+
+logger = logging.getLogger(__name__)
+
+
+def git_blob_sha(content: bytes) -> str:
+    """Git이 blob에 부여하는 SHA-1 계산 (Trees API의 sha와 동일)"""
+    header = f"blob {len(content)}\0".encode('utf-8')
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class SnapshotIngester:
+    """레포지토리 tarball 스트림을 한 번 읽으면서 소스 파일만 blob 캐시에 채웁니다"""
+
+    def __init__(self, blob_cache: BlobCache):
+        self.blob_cache = blob_cache
+
+    def ingest(self, fileobj: BinaryIO, include: Callable[[str], bool]) -> List[TreeEntry]:
+        """gzip tarball 스트림에서 include를 통과한 파일만 저장하고 TreeEntry 목록 반환"""
+        entries = []
+        # 스트림 모드("r|gz")로 읽어 아카이브 전체를 메모리/디스크에 두지 않음
+        with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # GitHub tarball은 "owner-repo-sha/" 최상위 디렉토리를 가짐
+                parts = member.name.split("/", 1)
+                if len(parts) < 2 or not include(parts[1]):
+                    continue
+
+                content = archive.extractfile(member).read()
+                sha = git_blob_sha(content)
+                if not self.blob_cache.contains(sha):
+                    self.blob_cache.put(sha, content)
+                entries.append(TreeEntry(parts[1], sha, len(content)))
+
+        logger.info(f"Ingested {len(entries)} source files from snapshot")
+        return entries
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryStore:
+    """파일(blob SHA)·디렉토리 단위 LLM 요약을 필요할 때 생성해 SQLite에 보관합니다
+
+    파일 요약은 blob이 바뀌기 전까지, 디렉토리 요약은 포함된 파일 blob이 모두 같을 때까지 유효합니다.
+    """
+
+    def __init__(self, gpt_service, db_path: str = "data/cache/summaries.sqlite3"):
+        self.gpt_service = gpt_service
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get_file_summary(self, sha: str, path: str, load_content: Callable[[], str],
+                         create: bool = True) -> Optional[str]:
+        """파일 요약 조회 (없으면 내용을 불러와 생성, create가 False면 None)"""
+        key = f"file:{sha}"
+        summary = self._get(key)
+        if summary is None and create:
+            summary = self.gpt_service.summarize_file(path, load_content())
+            self._put(key, path, summary)
+        return summary
+
+    def get_directory_summary(self, path: str, files: List[Tuple[str, str, str]],
+                              create: bool = True) -> Optional[str]:
+        """(경로, blob SHA, 파일 요약) 목록으로 디렉토리 요약 조회 (없으면 생성, create가 False면 None)"""
+        digest = hashlib.sha1(
+            "\n".join([path] + sorted(f"{file_path}@{sha}" for file_path, sha, _ in files)).encode('utf-8')
+        ).hexdigest()
+        key = f"dir:{digest}"
+        summary = self._get(key)
+        if summary is None and create:
+            summary = self.gpt_service.summarize_directory(
+                path, [(file_path, file_summary) for file_path, _, file_summary in files]
+            )
+            self._put(key, path, summary)
+        return summary
+
+    def _get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _put(self, key: str, path: str, summary: str):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, path, summary, created_at) VALUES (?, ?, ?, ?)",
+                (key, path, summary, time.time())
+            )
+            self.conn.commit()
@@ -0,0 +1,212 @@
+import ast
+import json
+import logging
+import os
+import re
+import threading
+from typing import List, NamedTuple, Optional, Sequence
+from services.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class Symbol(NamedTuple):
+    """함수/클래스/메서드 한 개와 그 줄 범위 (1부터 시작, 끝 줄 포함)"""
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+
+
+BRACE_EXTENSIONS = ('.js', '.java', '.cpp', '.cs', '.php')
+
+# 중괄호 언어의 선언부 패턴 (줄 단위로 검사)
+CLASS_PATTERN = re.compile(r"^\s*(?:[\w\[\]]+\s+)*(?:class|interface|enum|struct|trait)\s+(\w+)")
+FUNCTION_PATTERNS = [
+    # JS/PHP: function name(...)
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:(?:public|private|protected|static|final|abstract)\s+)*function\s*\*?\s*&?\s*(\w+)\s*\("),
+    # JS: name = function(...) / name = (...) =>
+    re.compile(r"^\s*(?:export\s+)?(?:const|let|var)?\s*(\w+)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>)"),
+    # Java/C#/C++/JS 메서드: [수식어] [반환 타입] name(...) {  (제어문 제외)
+    # 본문이 같은 줄에서 열고 닫히는 경우(name() { return x; })는 인자에 괄호가 없을 때만 인정해 호출문과 구분
+    re.compile(r"^\s*(?:[\w<>\[\],:*&~]+\s+)*?(?!(?:if|for|while|switch|catch|return|else|new|do|using|lock)\b)(~?[A-Za-z_][\w:]*)\s*\((?:[^;]*$|[^;{()]*\)[^;{()]*\{)"),
+]
+
+
+def extract_symbols(path: str, source: str) -> List[Symbol]:
+    """파일 확장자에 맞는 파서로 심볼 목록 추출"""
+    if path.endswith('.py'):
+        return _extract_python(source)
+    if path.endswith(BRACE_EXTENSIONS):
+        return _extract_braced(source)
+    return []
+
+
+def _extract_python(source: str) -> List[Symbol]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+
+    def visit(node, parent: Optional[str]):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if parent else "function"
+                name = f"{parent}.{child.name}" if parent else child.name
+                symbols.append(Symbol(name, kind, start, child.end_lineno))
+                visit(child, name if isinstance(child, ast.ClassDef) else None)
+
+    visit(tree, None)
+    return symbols
+
+
+def _extract_braced(source: str) -> List[Symbol]:
+    """선언부 패턴과 중괄호 짝 맞추기로 심볼 범위를 찾는 경량 파서"""
+    lines = source.splitlines()
+    symbols = []
+    class_stack = []  # (이름, 끝 줄)
+    for index, line in enumerate(lines):
+        line_no = index + 1
+        while class_stack and class_stack[-1][1] < line_no:
+            class_stack.pop()
+
+        match = CLASS_PATTERN.match(line)
+        kind = "class"
+        if not match:
+            match = next((p.match(line) for p in FUNCTION_PATTERNS if p.match(line)), None)
+            kind = "method" if class_stack else "function"
+        if not match:
+            continue
+
+        end_line = _find_block_end(lines, index)
+        if end_line is None:
+            continue
+        name = match.group(1)
+        if class_stack and kind != "class":
+            name = f"{class_stack[-1][0]}.{name}"
+        symbols.append(Symbol(name, kind, line_no, end_line))
+        if kind == "class":
+            class_stack.append((name, end_line))
+    return symbols
+
+
+def _find_block_end(lines: Sequence[str], start: int, lookahead: int = 3) -> Optional[int]:
+    """선언 줄 이후 첫 '{'부터 짝이 맞는 '}'가 있는 줄 번호 반환"""
+    depth = 0
+    opened = False
+    for index in range(start, len(lines)):
+        code = _strip_strings(lines[index])
+        if not opened:
+            if index - start > lookahead or (";" in code and "{" not in code):
+                return None
+        for char in code:
+            if char == "{":
+                depth += 1
+                opened = True
+            elif char == "}" and opened:
+                depth -= 1
+                if depth == 0:
+                    return index + 1
+    return None
+
+
+STRING_PATTERN = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|`[^`]*`|//.*$")
+
+
+def _strip_strings(line: str) -> str:
+    return STRING_PATTERN.sub("", line)
+
+
+def select_snippets(source: str, symbols: Sequence[Symbol], query: str,
+                    context_lines: int = 3, max_symbols: int = 5,
+                    keywords: Optional[Sequence[str]] = None) -> Optional[str]:
+    """질의와 관련된 심볼과 주변 줄만 추려 반환 (관련 심볼이 없으면 None)
+
+    keywords가 주어지면 질의를 다시 토큰화하지 않고 그 토큰(동의어 확장 포함)으로 찾습니다.
+    """
+    query_tokens = set(keywords) if keywords is not None else set(tokenize(query))
+    if not query_tokens or not symbols:
+        return None
+
+    lines = source.splitlines()
+    scored = []
+    for symbol in symbols:
+        start, end = _own_span(symbol, symbols)
+        name_hits = len(query_tokens & set(tokenize(symbol.name.rsplit(".", 1)[-1])))
+        body_hits = len(query_tokens & set(tokenize("\n".join(lines[start - 1:end]))))
+        score = name_hits * 3 + body_hits
+        if score > 0:
+            scored.append((score, -(end - start), start, end))
+    if not scored:
+        return None
+
+    # 가장 관련도 높은 심볼부터 선택하되, 이미 선택된 범위에 포함된 심볼은 건너뜀
+    spans = []
+    for _, _, start, end in sorted(scored, reverse=True):
+        if any(s <= start and end <= e for s, e in spans):
+            continue
+        spans.append((max(1, start - context_lines), min(len(lines), end + context_lines)))
+        if len(spans) >= max_symbols:
+            break
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    parts = []
+    for start, end in merged:
+        parts.append(f"[lines {start}-{end}]")
+        parts.append("\n".join(lines[start - 1:end]))
+    return "\n".join(parts)
+
+
+def _own_span(symbol: Symbol, symbols: Sequence[Symbol]):
+    """클래스는 본문 전체 대신 첫 번째 하위 심볼 직전까지만 (선언부) 범위로 사용"""
+    if symbol.kind != "class":
+        return symbol.start_line, symbol.end_line
+    children = [
+        other.start_line for other in symbols
+        if other is not symbol and symbol.start_line < other.start_line <= symbol.end_line
+    ]
+    return symbol.start_line, (min(children) - 1) if children else symbol.end_line
+
+
+class SymbolStore:
+    """blob SHA별 심볼 추출 결과를 디스크에 보관합니다 (내용이 같으면 결과도 같음)"""
+
+    def __init__(self, cache_dir: str = "data/cache/symbols"):
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self._memory = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_symbols(self, sha: str, path: str, source: str) -> List[Symbol]:
+        """저장된 심볼을 조회하고, 없으면 추출해 저장"""
+        with self.lock:
+            if sha in self._memory:
+                return self._memory[sha]
+
+        file_path = os.path.join(self.cache_dir, sha[:2], f"{sha[2:]}.json")
+        try:
+            with open(file_path, 'r') as f:
+                symbols = [Symbol(*item) for item in json.load(f)]
+        except (FileNotFoundError, ValueError):
+            symbols = extract_symbols(path, source)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump([list(symbol) for symbol in symbols], f)
+            os.replace(tmp_path, file_path)
+
+        with self.lock:
+            self._memory[sha] = symbols
+        return symbols
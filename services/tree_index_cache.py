@@ -0,0 +1,73 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+from services.tree_lister import TreeEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class TreeIndexCache:
+    """(레포지토리, 커밋 SHA) 단위로 파일 트리를 디스크에 캐시합니다"""
+
+    def __init__(self, cache_dir: str = "data/cache/trees", max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("TREE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+        )
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, repo_name: str, commit_sha: str) -> Optional[List[TreeEntry]]:
+        """캐시된 트리 조회 (없으면 None)"""
+        path = self._path_for(repo_name, commit_sha)
+        with self.lock:
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+            # 접근 시각을 갱신해 LRU 순서에 반영
+            os.utime(path)
+        return [TreeEntry(*item) for item in data["entries"]]
+
+    def put(self, repo_name: str, commit_sha: str, entries: List[TreeEntry]):
+        """트리를 저장하고 용량 한도를 넘으면 오래된 항목부터 삭제"""
+        path = self._path_for(repo_name, commit_sha)
+        data = {
+            'repo': repo_name,
+            'commit_sha': commit_sha,
+            'entries': [list(entry) for entry in entries]
+        }
+        with self.lock:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self):
+        """디스크 사용량이 한도를 넘으면 가장 오래 사용되지 않은 트리부터 삭제"""
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            files.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            logger.debug(f"Evicted tree index {name}")
+
+    def _path_for(self, repo_name: str, commit_sha: str) -> str:
+        key = hashlib.sha1(f"{repo_name}@{commit_sha}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
@@ -0,0 +1,64 @@
+from typing import Dict, List, NamedTuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TreeEntry(NamedTuple):
+    """레포지토리 트리의 파일(blob) 한 개를 나타내는 경량 레코드"""
+    path: str
+    sha: str
+    size: int
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+
+class TreeLister:
+    """Git Trees API로 커밋의 전체 파일 목록을 조회합니다"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def list_files(self, repo_name: str, ref: str) -> List[TreeEntry]:
+        """커밋(또는 브랜치)의 모든 파일을 재귀 트리 요청 한 번으로 조회"""
+        tree = self._get_tree(repo_name, ref, recursive=True)
+        if not tree.get("truncated"):
+            return self._collect(tree, "")
+
+        # 트리가 잘린 경우 하위 트리 단위로 나누어 다시 조회
+        logger.info(f"Tree for {repo_name}@{ref} is truncated, fetching subtrees")
+        return self._list_subtree(repo_name, ref, "")
+
+    def _list_subtree(self, repo_name: str, tree_sha: str, prefix: str) -> List[TreeEntry]:
+        """잘린 트리를 한 단계씩 펼치며 하위 트리를 재귀 요청으로 조회"""
+        entries = []
+        tree = self._get_tree(repo_name, tree_sha, recursive=False)
+        for item in tree["tree"]:
+            path = f"{prefix}{item['path']}"
+            if item["type"] == "blob":
+                entries.append(TreeEntry(path, item["sha"], item.get("size") or 0))
+            elif item["type"] == "tree":
+                subtree = self._get_tree(repo_name, item["sha"], recursive=True)
+                if subtree.get("truncated"):
+                    entries.extend(self._list_subtree(repo_name, item["sha"], f"{path}/"))
+                else:
+                    entries.extend(self._collect(subtree, f"{path}/"))
+        return entries
+
+    def _get_tree(self, repo_name: str, tree_sha: str, recursive: bool) -> Dict:
+        path = f"/repos/{repo_name}/git/trees/{tree_sha}"
+        if recursive:
+            path += "?recursive=1"
+        # SHA로 지정한 트리는 바뀌지 않고 TreeIndexCache가 커밋 단위로 보관하므로 HTTP 캐시에 저장하지 않음
+        return self.client.get_json(path, cacheable=False)
+
+    @staticmethod
+    def _collect(tree: Dict, prefix: str) -> List[TreeEntry]:
+        """트리 응답에서 blob 항목만 TreeEntry로 변환"""
+        return [
+            TreeEntry(f"{prefix}{item['path']}", item["sha"], item.get("size") or 0)
+            for item in tree["tree"]
+            if item["type"] == "blob"
+        ]
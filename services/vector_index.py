@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from services.tree_lister import TreeEntry
+
+logger = logging.getLogger(__name__)
+
+CHUNK_LINES = 60
+CHUNK_OVERLAP = 10
+SEARCH_BLOCK_ROWS = 65536
+
+
+class Chunk(NamedTuple):
+    path: str
+    sha: str
+    start_line: int
+    end_line: int
+
+
+def chunk_source(source: str) -> List[Tuple[int, int, str]]:
+    """소스를 겹치는 줄 단위 청크 (시작 줄, 끝 줄, 텍스트)로 분할"""
+    lines = source.splitlines()
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = min(len(lines), start + CHUNK_LINES)
+        chunks.append((start + 1, end, "\n".join(lines[start:end])))
+        if end == len(lines):
+            break
+        start = end - CHUNK_OVERLAP
+    return chunks
+
+
+class VectorIndex:
+    """한 레포지토리의 청크 벡터 (float16 memmap)와 청크 메타데이터"""
+
+    def __init__(self, commit_sha: str, embedder_name: str, chunks: List[Chunk], matrix: np.ndarray):
+        self.commit_sha = commit_sha
+        self.embedder_name = embedder_name
+        self.chunks = chunks
+        self.matrix = matrix
+
+    def search_chunks(self, query_vector: np.ndarray, k: int) -> List[Tuple[Chunk, float]]:
+        """코사인 유사도 상위 k개 청크 (벡터는 정규화되어 있어 내적이 곧 코사인)"""
+        if not self.chunks:
+            return []
+        query = query_vector.astype(np.float32)
+        scores = np.empty(len(self.chunks), dtype=np.float32)
+        for start in range(0, len(self.chunks), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks[i], float(scores[i])) for i in top]
+
+    def search_files(self, query_vector: np.ndarray, k: int, chunk_pool: int = 200) -> List[Tuple[TreeEntry, float]]:
+        """청크 점수의 파일별 최댓값으로 상위 k개 파일 반환"""
+        best = {}
+        for chunk, score in self.search_chunks(query_vector, chunk_pool):
+            key = (chunk.path, chunk.sha)
+            if key not in best or score > best[key]:
+                best[key] = score
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(TreeEntry(path, sha, 0), score) for (path, sha), score in ranked]
+
+
+class VectorIndexStore:
+    """레포지토리별 청크 벡터를 float16 행렬로 memmap 해 보관합니다
+
+    새 커밋으로 다시 만들 때는 blob SHA가 같은 파일의 벡터를 이전 행렬에서 재사용합니다.
+    """
+
+    def __init__(self, embedder, cache_dir: str = "data/cache/vectors"):
+        self.embedder = embedder
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self._indexes = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, repo_name: str, commit_sha: str) -> Optional[VectorIndex]:
+        """해당 커밋의 색인 조회 (없거나 임베더가 다르면 None)"""
+        index = self._load(repo_name)
+        if index is None or index.commit_sha != commit_sha or index.embedder_name != self.embedder.name:
+            return None
+        return index
+
+    def build(self, repo_name: str, commit_sha: str, entries: Sequence[TreeEntry],
+              contents: Sequence[Optional[bytes]]) -> VectorIndex:
+        """커밋의 청크 벡터 행렬을 생성 (변경되지 않은 blob의 벡터는 재사용)"""
+        previous = self._load(repo_name)
+        reusable = {}
+        if previous is not None and previous.embedder_name == self.embedder.name:
+            for row, chunk in enumerate(previous.chunks):
+                reusable.setdefault(chunk.sha, []).append((row, chunk))
+
+        chunks = []
+        reused_rows = []  # (새 행, 이전 행)
+        new_texts = []
+        new_rows = []
+        for entry, content in zip(entries, contents):
+            if entry.sha in reusable:
+                for row, chunk in reusable[entry.sha]:
+                    reused_rows.append((len(chunks), row))
+                    chunks.append(Chunk(entry.path, entry.sha, chunk.start_line, chunk.end_line))
+                continue
+            if content is None:
+                continue
+            for start_line, end_line, text in chunk_source(content.decode('utf-8', errors='ignore')):
+                new_rows.append(len(chunks))
+                new_texts.append(f"{entry.path}\n{text}")
+                chunks.append(Chunk(entry.path, entry.sha, start_line, end_line))
+
+        new_vectors = self.embedder.embed(new_texts) if new_texts else None
+        if new_vectors is not None:
+            dim = new_vectors.shape[1]
+        elif reused_rows:
+            dim = previous.matrix.shape[1]
+        else:
+            dim = self.embedder.dim or 1
+
+        repo_dir = self._repo_dir(repo_name)
+        os.makedirs(repo_dir, exist_ok=True)
+        # 이전 행렬을 읽는 중에 덮어쓰지 않도록 매번 새 파일에 기록 (다른 프로세스·스레드와 겹치지 않는 이름)
+        suffix = f"{int(time.time() * 1000)}-{os.getpid()}-{threading.get_ident()}"
+        matrix_path = os.path.join(repo_dir, f"{commit_sha}-{suffix}.f16")
+        matrix = np.lib.format.open_memmap(
+            matrix_path, mode='w+', dtype=np.float16, shape=(len(chunks), dim)
+        )
+        for new_row, old_row in reused_rows:
+            matrix[new_row] = previous.matrix[old_row]
+        if new_vectors is not None:
+            matrix[new_rows] = new_vectors.astype(np.float16)
+        matrix.flush()
+        del matrix
+
+        meta = {
+            'commit_sha': commit_sha,
+            'embedder': self.embedder.name,
+            'matrix': os.path.basename(matrix_path),
+            'chunks': [list(chunk) for chunk in chunks]
+        }
+        meta_path = os.path.join(repo_dir, "meta.json")
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._cleanup(repo_dir, meta['matrix'])
+
+        logger.info(
+            f"Built vector index for {repo_name}@{commit_sha} "
+            f"({len(chunks)} chunks, {len(new_texts)} embedded, {len(reused_rows)} reused)"
+        )
+        with self.lock:
+            self._indexes.pop(repo_name, None)
+        return self._load(repo_name)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embedder.embed([query])[0]
+
+    def _load(self, repo_name: str) -> Optional[VectorIndex]:
+        with self.lock:
+            if repo_name in self._indexes:
+                return self._indexes[repo_name]
+
+        repo_dir = self._repo_dir(repo_name)
+        try:
+            with open(os.path.join(repo_dir, "meta.json"), 'r') as f:
+                meta = json.load(f)
+            matrix = np.load(os.path.join(repo_dir, meta['matrix']), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+
+        index = VectorIndex(
+            meta['commit_sha'], meta['embedder'], [Chunk(*chunk) for chunk in meta['chunks']], matrix
+        )
+        with self.lock:
+            self._indexes[repo_name] = index
+        return index
+
+    @staticmethod
+    def _cleanup(repo_dir: str, keep: str):
+        """현재 커밋 외의 이전 행렬 파일 삭제"""
+        for name in os.listdir(repo_dir):
+            if name.endswith(".f16") and name != keep:
+                try:
+                    os.remove(os.path.join(repo_dir, name))
+                except OSError:
+                    pass
+
+    def _repo_dir(self, repo_name: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(repo_name.encode('utf-8')).hexdigest())
@@ -0,0 +1,29 @@
+from services.symbol_index import Symbol, extract_symbols
+
+
+def test_one_line_brace_body_is_extracted():
+    source = "\n".join([
+        "class Point {",
+        "    int getX() { return x; }",
+        "    int getY() {",
+        "        return y;",
+        "    }",
+        "}",
+    ])
+
+    assert extract_symbols("Point.java", source) == [
+        Symbol("Point", "class", 1, 6),
+        Symbol("Point.getX", "method", 2, 2),
+        Symbol("Point.getY", "method", 3, 5),
+    ]
+
+
+def test_call_with_inline_callback_is_not_a_symbol():
+    source = "\n".join([
+        "function setup() {",
+        "    register(name, function() { return 1; });",
+        "    if (ready) { start(); }",
+        "}",
+    ])
+
+    assert extract_symbols("setup.js", source) == [Symbol("setup", "function", 1, 4)]